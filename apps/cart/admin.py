@@ -2,6 +2,7 @@ from django.contrib import admin
 from django.utils.html import format_html
 
 from .models import Cart, CartItem
+from services.paginator import EstimatedCountPaginator
 
 
 class CartItemInline(admin.TabularInline):
@@ -10,6 +11,9 @@ class CartItemInline(admin.TabularInline):
     readonly_fields = ['line_total_display']
     raw_id_fields = ['product']
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('product').with_line_totals()
+
     def line_total_display(self, obj: CartItem) -> str:
         return f"${obj.line_total:.2f}"
     line_total_display.short_description = 'Line Total'
@@ -23,6 +27,9 @@ class CartAdmin(admin.ModelAdmin):
     readonly_fields = ['session_key', 'created_at', 'updated_at']
     inlines = [CartItemInline]
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('user').with_totals()
+
     def session_key_short(self, obj: Cart) -> str:
         if obj.session_key:
             return f"{obj.session_key[:12]}..."
@@ -32,10 +39,12 @@ class CartAdmin(admin.ModelAdmin):
     def items_count(self, obj: Cart) -> int:
         return obj.total_items
     items_count.short_description = 'Items'
+    items_count.admin_order_field = 'items_quantity'
 
     def subtotal_display(self, obj: Cart) -> str:
         return f"${obj.subtotal:.2f}"
     subtotal_display.short_description = 'Subtotal'
+    subtotal_display.admin_order_field = 'items_subtotal'
 
 
 @admin.register(CartItem)
@@ -44,7 +53,14 @@ class CartItemAdmin(admin.ModelAdmin):
     list_filter = ['size', 'created_at']
     search_fields = ['product__name', 'cart__user__email']
     raw_id_fields = ['cart', 'product']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    show_facets = admin.ShowFacets.NEVER
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('cart__user', 'product').with_line_totals()
 
     def line_total_display(self, obj: CartItem) -> str:
         return f"${obj.line_total:.2f}"
     line_total_display.short_description = 'Line Total'
+    line_total_display.admin_order_field = 'line_amount'
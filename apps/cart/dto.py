@@ -1,8 +1,9 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from decimal import Decimal
 from typing import Optional
 
-from apps.catalog.models import Product
+from apps.catalog.models import SIZES
+from apps.catalog.utils import get_main_image
 
 
 @dataclass(frozen=True)
@@ -22,19 +23,21 @@ class CartItemDTO:
 
     @classmethod
     def from_cart_item(cls, cart_item) -> 'CartItemDTO':
-        main_image = cart_item.product.images.filter(is_main=True).first()
-        if not main_image:
-            main_image = cart_item.product.images.first()
+        return cls.from_product(cart_item.product, cart_item.size, cart_item.quantity)
+
+    @classmethod
+    def from_product(cls, product, size: str, quantity: int) -> 'CartItemDTO':
+        main_image = get_main_image(product)
 
         return cls(
-            product_id=cart_item.product.id,
-            product_name=cart_item.product.name,
-            product_slug=cart_item.product.slug,
-            product_price=cart_item.product.price,
-            product_brand=cart_item.product.brand,
+            product_id=product.id,
+            product_name=product.name,
+            product_slug=product.slug,
+            product_price=product.price,
+            product_brand=product.brand,
             product_image_url=main_image.image.url if main_image else None,
-            size=cart_item.size,
-            quantity=cart_item.quantity,
+            size=size,
+            quantity=quantity,
         )
 
 
@@ -54,16 +57,63 @@ class CartDTO:
     def is_empty(self) -> bool:
         return len(self.items) == 0
 
+    def with_quantity_delta(self, product_id: int, size: str, delta: int) -> tuple['CartDTO', int]:
+        items = []
+        applied = 0
+        for item in self.items:
+            if item.product_id == product_id and item.size == size:
+                quantity = max(1, item.quantity + delta)
+                applied = quantity - item.quantity
+                item = replace(item, quantity=quantity)
+            items.append(item)
+        return CartDTO(items=items), applied
+
     @classmethod
     def from_cart(cls, cart) -> 'CartDTO':
-        items = [CartItemDTO.from_cart_item(item) for item in cart.items.all()]
-        return cls(items=items)
+        return cls.from_items(cart.items.all())
+
+    @classmethod
+    def from_items(cls, cart_items) -> 'CartDTO':
+        return cls(items=[CartItemDTO.from_cart_item(item) for item in cart_items])
 
     @classmethod
     def empty(cls) -> 'CartDTO':
         return cls(items=[])
 
 
+@dataclass(frozen=True)
+class CartOwner:
+    session_key: Optional[str] = None
+    user: Optional[object] = None
+
+    @property
+    def key(self) -> str:
+        if self.user is not None:
+            return f'user:{self.user.pk}'
+        return f'session:{self.session_key}'
+
+
+@dataclass(frozen=True)
+class CartLine:
+    product_id: int
+    size: str
+    quantity: int
+
+
+@dataclass(frozen=True)
+class CartSummaryDTO:
+    total_items: int
+    subtotal: Decimal
+
+    @classmethod
+    def from_cart_dto(cls, cart_dto: CartDTO) -> 'CartSummaryDTO':
+        return cls(total_items=cart_dto.total_items, subtotal=Decimal(cart_dto.subtotal))
+
+    @classmethod
+    def empty(cls) -> 'CartSummaryDTO':
+        return cls(total_items=0, subtotal=Decimal('0.00'))
+
+
 @dataclass(frozen=True)
 class AddToCartDTO:
     product_id: int
@@ -82,3 +132,53 @@ class UpdateCartItemDTO:
 class RemoveFromCartDTO:
     product_id: int
     size: str
+
+
+@dataclass(frozen=True)
+class CartOperationDTO:
+    op: str
+    product_id: int
+    size: str
+    quantity: int = 1
+
+    OPERATIONS = ('add', 'update', 'increment', 'remove')
+    SIZES = tuple(code for code, _ in SIZES)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'CartOperationDTO':
+        if not isinstance(data, dict):
+            raise TypeError('Operation must be an object')
+
+        op = data.get('op')
+        size = data.get('size')
+        if op not in cls.OPERATIONS:
+            raise ValueError(f'Unknown operation: {op}')
+        if size not in cls.SIZES:
+            raise ValueError(f'Unknown size: {size}')
+
+        quantity = int(data.get('quantity', 1))
+        if op == 'add' and quantity < 1:
+            raise ValueError('Quantity must be positive')
+
+        return cls(op=op, product_id=int(data['product_id']), size=size, quantity=quantity)
+
+    @staticmethod
+    def fold(quantities: dict, operations: list['CartOperationDTO']) -> dict:
+        quantities = dict(quantities)
+
+        for operation in operations:
+            key = (operation.product_id, operation.size)
+            current = quantities.get(key, 0)
+
+            if operation.op == 'add':
+                quantities[key] = current + operation.quantity
+            elif operation.op == 'remove':
+                quantities[key] = 0
+            elif not current:
+                continue
+            elif operation.op == 'update':
+                quantities[key] = max(0, operation.quantity)
+            elif operation.op == 'increment':
+                quantities[key] = max(1, current + operation.quantity)
+
+        return quantities
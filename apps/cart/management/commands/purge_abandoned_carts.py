@@ -0,0 +1,129 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+
+from apps.cart.models import Cart, CartItem
+
+
+DATABASE_SESSION_ENGINES = (
+    'django.contrib.sessions.backends.db',
+    'django.contrib.sessions.backends.cached_db',
+)
+
+
+class Command(BaseCommand):
+    help = 'Deletes carts untouched for N days and expired sessions in small batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=30,
+            help='Delete carts with no activity in this many days (default: 30)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Rows deleted per transaction (default: 500)',
+        )
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=0.1,
+            help='Seconds to pause between batches (default: 0.1)',
+        )
+        parser.add_argument(
+            '--include-user-carts',
+            action='store_true',
+            help='Also delete abandoned carts that belong to registered users',
+        )
+        parser.add_argument(
+            '--skip-sessions',
+            action='store_true',
+            help='Do not delete expired sessions',
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        cutoff = timezone.now() - timedelta(days=options['days'])
+
+        carts_deleted, items_deleted = self.purge_carts(cutoff, options)
+        self.stdout.write(f'Deleted {carts_deleted} carts and {items_deleted} cart items')
+
+        if not options['skip_sessions']:
+            if settings.SESSION_ENGINE in DATABASE_SESSION_ENGINES:
+                sessions_deleted = self.purge_sessions(options)
+                self.stdout.write(f'Deleted {sessions_deleted} expired sessions')
+            else:
+                self.stdout.write(f'Skipping sessions: {settings.SESSION_ENGINE} does not store them in the database')
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Purge finished in {time.monotonic() - started:.2f}s')
+        )
+
+    def purge_carts(self, cutoff, options) -> tuple[int, int]:
+        # Item mutations do not touch Cart.updated_at, so a cart only counts as
+        # abandoned when none of its lines changed after the cutoff either.
+        recent_items = CartItem.objects.filter(cart=OuterRef('pk'), updated_at__gte=cutoff)
+        abandoned = (
+            Cart.objects
+            .filter(updated_at__lt=cutoff)
+            .filter(~Exists(recent_items))
+            .order_by('updated_at', 'id')
+        )
+        if not options['include_user_carts']:
+            abandoned = abandoned.filter(user__isnull=True)
+
+        carts_deleted = 0
+        items_deleted = 0
+        last = None
+
+        while True:
+            batch = abandoned
+            if last is not None:
+                last_updated_at, last_id = last
+                batch = batch.filter(
+                    Q(updated_at__gt=last_updated_at) | Q(updated_at=last_updated_at, id__gt=last_id)
+                )
+
+            rows = list(batch.values_list('updated_at', 'id')[:options['batch_size']])
+            if not rows:
+                break
+
+            # Deleting through the predicate again skips carts that were
+            # touched after the batch was read.
+            with transaction.atomic():
+                _, deleted = abandoned.filter(id__in=[cart_id for _, cart_id in rows]).delete()
+
+            carts_deleted += deleted.get(Cart._meta.label, 0)
+            items_deleted += deleted.get(CartItem._meta.label, 0)
+            last = rows[-1]
+
+            self.stdout.write(f'  ...{carts_deleted} carts deleted')
+            time.sleep(options['sleep'])
+
+        return carts_deleted, items_deleted
+
+    def purge_sessions(self, options) -> int:
+        expired = Session.objects.filter(expire_date__lt=timezone.now()).order_by('expire_date')
+        sessions_deleted = 0
+
+        while True:
+            keys = list(expired.values_list('session_key', flat=True)[:options['batch_size']])
+            if not keys:
+                break
+
+            deleted, _ = Session.objects.filter(session_key__in=keys).delete()
+            sessions_deleted += deleted
+
+            self.stdout.write(f'  ...{sessions_deleted} sessions deleted')
+            time.sleep(options['sleep'])
+
+        return sessions_deleted
@@ -1,7 +1,23 @@
 from decimal import Decimal
 from django.db import models
+from django.db.models import DecimalField, ExpressionWrapper, F, Sum, Value
+from django.db.models.functions import Coalesce
 from django.conf import settings
 
+from apps.catalog.models import SIZES
+
+
+class CartQuerySet(models.QuerySet):
+    def with_totals(self) -> 'CartQuerySet':
+        return self.annotate(
+            items_quantity=Coalesce(Sum('items__quantity'), 0),
+            items_subtotal=Coalesce(
+                Sum(F('items__quantity') * F('items__product__price')),
+                Value(Decimal('0.00')),
+                output_field=DecimalField(max_digits=12, decimal_places=2),
+            ),
+        )
+
 
 class Cart(models.Model):
     session_key = models.CharField(max_length=40, db_index=True, null=True, blank=True)
@@ -15,10 +31,13 @@ class Cart(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = CartQuerySet.as_manager()
+
     class Meta:
         indexes = [
             models.Index(fields=['session_key']),
             models.Index(fields=['user']),
+            models.Index(fields=['updated_at']),
         ]
 
     def __str__(self) -> str:
@@ -26,23 +45,40 @@ class Cart(models.Model):
             return f"Cart #{self.id} for {self.user}"
         return f"Cart #{self.id} (session: {self.session_key[:8]}...)"
 
+    def _totals(self) -> tuple[int, Decimal]:
+        if not hasattr(self, 'items_subtotal'):
+            totals = (
+                Cart.objects
+                .with_totals()
+                .filter(pk=self.pk)
+                .values('items_quantity', 'items_subtotal')
+                .first()
+            )
+            self.items_quantity = totals['items_quantity'] if totals else 0
+            self.items_subtotal = totals['items_subtotal'] if totals else Decimal('0.00')
+        return self.items_quantity, self.items_subtotal
+
     @property
     def total_items(self) -> int:
-        return sum(item.quantity for item in self.items.all())
+        return self._totals()[0]
 
     @property
     def subtotal(self) -> Decimal:
-        return sum(item.line_total for item in self.items.all())
+        return self._totals()[1]
+
+
+class CartItemQuerySet(models.QuerySet):
+    def with_line_totals(self) -> 'CartItemQuerySet':
+        return self.annotate(
+            line_amount=ExpressionWrapper(
+                F('quantity') * F('product__price'),
+                output_field=DecimalField(max_digits=12, decimal_places=2),
+            ),
+        )
 
 
 class CartItem(models.Model):
-    SIZES = [
-        ('XS', 'Extra Small'),
-        ('S', 'Small'),
-        ('M', 'Medium'),
-        ('L', 'Large'),
-        ('XL', 'Extra Large'),
-    ]
+    SIZES = SIZES
 
     cart = models.ForeignKey(Cart, on_delete=models.CASCADE, related_name='items')
     product = models.ForeignKey(
@@ -55,6 +91,8 @@ class CartItem(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = CartItemQuerySet.as_manager()
+
     class Meta:
         unique_together = ['cart', 'product', 'size']
         indexes = [
@@ -66,4 +104,6 @@ class CartItem(models.Model):
 
     @property
     def line_total(self) -> Decimal:
+        if hasattr(self, 'line_amount'):
+            return self.line_amount
         return self.product.price * self.quantity
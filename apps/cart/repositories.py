@@ -1,7 +1,12 @@
+from decimal import Decimal
 from typing import Optional
-from django.db import transaction
+from django.db import connection, transaction
+from django.db.models import DecimalField, F, QuerySet, Sum
+from django.db.models.functions import Greatest
 from django.contrib.auth.models import AbstractUser
+from django.utils import timezone
 
+from .dto import CartLine, CartOperationDTO, CartSummaryDTO
 from .models import Cart, CartItem
 from apps.catalog.models import Product
 
@@ -58,67 +63,179 @@ class CartRepository:
 
         return None
 
+    @staticmethod
+    def get_summary(
+        session_key: Optional[str] = None,
+        user: Optional[AbstractUser] = None
+    ) -> CartSummaryDTO:
+        if user and user.is_authenticated:
+            items = CartItem.objects.filter(cart__user=user)
+        elif session_key:
+            items = CartItem.objects.filter(cart__session_key=session_key)
+        else:
+            return CartSummaryDTO.empty()
+
+        totals = items.aggregate(
+            total_items=Sum('quantity'),
+            subtotal=Sum(
+                F('quantity') * F('product__price'),
+                output_field=DecimalField(max_digits=12, decimal_places=2)
+            ),
+        )
+        return CartSummaryDTO(
+            total_items=totals['total_items'] or 0,
+            subtotal=totals['subtotal'] or Decimal('0.00'),
+        )
+
     @staticmethod
     def delete_cart(cart: Cart) -> None:
         cart.delete()
 
     @staticmethod
-    def merge_carts(session_cart: Cart, user_cart: Cart) -> Cart:
-        with transaction.atomic():
-            for item in session_cart.items.all():
-                existing_item = user_cart.items.filter(
-                    product=item.product,
-                    size=item.size
-                ).first()
+    def assign_to_user(cart: Cart, user: AbstractUser) -> Cart:
+        Cart.objects.filter(pk=cart.pk).update(user=user, session_key=None, updated_at=timezone.now())
+        return cart
 
-                if existing_item:
-                    existing_item.quantity += item.quantity
-                    existing_item.save()
-                else:
-                    item.cart = user_cart
-                    item.save()
+    @staticmethod
+    def merge_carts(session_cart: Cart, user_cart: Cart) -> Cart:
+        item_table = connection.ops.quote_name(CartItem._meta.db_table)
+        now = connection.ops.adapt_datetimefield_value(timezone.now())
+
+        # Copies every session line into the user cart in one statement, adding
+        # quantities where the user already has the same product and size.
+        sql = (
+            f'INSERT INTO {item_table} (cart_id, product_id, size, quantity, created_at, updated_at) '
+            f'SELECT %s, product_id, size, quantity, created_at, %s FROM {item_table} WHERE cart_id = %s '
+            f'ON CONFLICT (cart_id, product_id, size) DO UPDATE SET '
+            f'quantity = {item_table}.quantity + excluded.quantity, '
+            f'updated_at = excluded.updated_at'
+        )
 
-            session_cart.delete()
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute(sql, [user_cart.id, now, session_cart.id])
+            Cart.objects.filter(pk=session_cart.pk).delete()
 
         return user_cart
 
 
 class CartItemRepository:
     @staticmethod
-    def get_item(cart: Cart, product: Product, size: str) -> Optional[CartItem]:
-        return cart.items.filter(product=product, size=size).first()
+    def get_items(
+        session_key: Optional[str] = None,
+        user: Optional[AbstractUser] = None
+    ) -> QuerySet:
+        if user and user.is_authenticated:
+            return CartItem.objects.filter(cart__user=user)
+
+        if session_key:
+            return CartItem.objects.filter(cart__session_key=session_key)
+
+        return CartItem.objects.none()
 
     @staticmethod
-    def add_item(cart: Cart, product: Product, size: str, quantity: int = 1) -> CartItem:
-        item, created = CartItem.objects.get_or_create(
-            cart=cart,
-            product=product,
-            size=size,
-            defaults={'quantity': quantity}
+    def get_lines(items: QuerySet) -> list[CartItem]:
+        return list(
+            items
+            .select_related('product')
+            .prefetch_related('product__images')
+            .order_by('id')
         )
 
-        if not created:
-            item.quantity += quantity
-            item.save()
+    @staticmethod
+    def get_cart_lines(items: QuerySet) -> list[CartLine]:
+        return [
+            CartLine(product_id=product_id, size=size, quantity=quantity)
+            for product_id, size, quantity in items.order_by('id').values_list('product_id', 'size', 'quantity')
+        ]
+
+    @staticmethod
+    def add_item(cart_id: int, product_id: int, size: str, quantity: int = 1) -> bool:
+        item_table = connection.ops.quote_name(CartItem._meta.db_table)
+        product_table = connection.ops.quote_name(Product._meta.db_table)
+        now = connection.ops.adapt_datetimefield_value(timezone.now())
+
+        # Inserting from a SELECT on the product table validates the product in
+        # the same statement: an unknown id inserts nothing and touches no rows.
+        sql = (
+            f'INSERT INTO {item_table} (cart_id, product_id, size, quantity, created_at, updated_at) '
+            f'SELECT %s, id, %s, %s, %s, %s FROM {product_table} WHERE id = %s '
+            f'ON CONFLICT (cart_id, product_id, size) DO UPDATE SET '
+            f'quantity = {item_table}.quantity + excluded.quantity, '
+            f'updated_at = excluded.updated_at'
+        )
 
-        return item
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [cart_id, size, quantity, now, now, product_id])
+            return cursor.rowcount > 0
 
     @staticmethod
-    def update_item_quantity(item: CartItem, quantity: int) -> CartItem:
-        item.quantity = max(1, quantity)
-        item.save()
-        return item
+    def update_item_quantity(items: QuerySet, product_id: int, size: str, quantity: int) -> int:
+        return items.filter(product_id=product_id, size=size).update(
+            quantity=max(1, quantity),
+            updated_at=timezone.now(),
+        )
 
     @staticmethod
-    def increment_item_quantity(item: CartItem, delta: int = 1) -> CartItem:
-        item.quantity = max(1, item.quantity + delta)
-        item.save()
-        return item
+    def increment_item_quantity(items: QuerySet, product_id: int, size: str, delta: int = 1) -> int:
+        return items.filter(product_id=product_id, size=size).update(
+            quantity=Greatest(F('quantity') + delta, 1),
+            updated_at=timezone.now(),
+        )
+
+    @staticmethod
+    def remove_item(items: QuerySet, product_id: int, size: str) -> int:
+        deleted, _ = items.filter(product_id=product_id, size=size).delete()
+        return deleted
 
     @staticmethod
-    def remove_item(item: CartItem) -> None:
-        item.delete()
+    def apply_operations(cart: Cart, operations: list[CartOperationDTO]) -> None:
+        now = timezone.now()
+
+        with transaction.atomic():
+            existing = {
+                (item.product_id, item.size): item
+                for item in CartItem.objects.select_for_update().filter(cart=cart)
+            }
+            quantities = CartOperationDTO.fold(
+                {key: item.quantity for key, item in existing.items()},
+                operations,
+            )
+
+            to_create = []
+            to_update = []
+            to_delete = []
+
+            for key, quantity in quantities.items():
+                item = existing.get(key)
+                if item is None:
+                    if quantity > 0:
+                        product_id, size = key
+                        to_create.append(CartItem(
+                            cart=cart,
+                            product_id=product_id,
+                            size=size,
+                            quantity=quantity,
+                        ))
+                elif quantity <= 0:
+                    to_delete.append(item.id)
+                elif quantity != item.quantity:
+                    item.quantity = quantity
+                    item.updated_at = now
+                    to_update.append(item)
+
+            if to_create:
+                CartItem.objects.bulk_create(
+                    to_create,
+                    update_conflicts=True,
+                    unique_fields=['cart', 'product', 'size'],
+                    update_fields=['quantity', 'updated_at'],
+                )
+            if to_update:
+                CartItem.objects.bulk_update(to_update, ['quantity', 'updated_at'])
+            if to_delete:
+                CartItem.objects.filter(id__in=to_delete).delete()
 
     @staticmethod
-    def clear_cart(cart: Cart) -> None:
-        cart.items.all().delete()
+    def clear_cart(items: QuerySet) -> None:
+        items.delete()
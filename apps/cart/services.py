@@ -1,21 +1,57 @@
+import time
+from contextlib import contextmanager
 from typing import Optional
-from django.http import HttpRequest
-from django.shortcuts import get_object_or_404
+from django.conf import settings
+from django.core.cache import cache
+from django.http import Http404, HttpRequest
 
-from .models import Cart, CartItem
-from .dto import CartDTO, CartItemDTO, AddToCartDTO, UpdateCartItemDTO, RemoveFromCartDTO
-from .repositories import CartRepository, CartItemRepository
+from .dto import (
+    CartDTO, CartLine, CartOwner, CartSummaryDTO, CartOperationDTO,
+    AddToCartDTO, UpdateCartItemDTO, RemoveFromCartDTO
+)
+from .storage import get_cart_storage
 from apps.catalog.models import Product
 
 
+CART_SUMMARY_CACHE_TIMEOUT = 60 * 60
+
+# Quantity steppers are buffered per cart and written in one go once the
+# clicks stop, or as soon as anything needs the stored cart to be accurate.
+# The page flushes after the delay, and with a beacon when it is closed; any
+# later cart read flushes a quiet buffer too. Only a visitor whose browser
+# sent neither and who never returns loses the buffered clicks, when the
+# buffer expires after CART_PENDING_CACHE_TIMEOUT.
+CART_WRITE_BEHIND_DELAY = 2
+CART_WRITE_BEHIND_MAX_AGE = 10
+CART_PENDING_CACHE_TIMEOUT = 60 * 60 * 24
+CART_PENDING_LOCK_TIMEOUT = 5
+CART_PENDING_LOCK_WAIT = 1
+
+# The buffer must be visible to every worker, otherwise a checkout served by
+# another process would read stale quantities; per-process caches write through.
+LOCAL_CACHE_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+# login() cycles the session key, so the key an anonymous cart was stored under
+# is kept in the session data for the merge that runs right after.
+CART_SESSION_KEY = 'cart_session_key'
+
+
+def write_behind_enabled() -> bool:
+    return settings.CACHES['default']['BACKEND'] not in LOCAL_CACHE_BACKENDS
+
+
 class CartService:
     def __init__(self, request: HttpRequest):
         self._request = request
-        self._cart_repo = CartRepository()
-        self._item_repo = CartItemRepository()
+        self._storage = get_cart_storage()
 
-    def _get_session_key(self) -> str:
-        if not self._request.session.session_key:
+    def _get_session_key(self, create: bool = False) -> Optional[str]:
+        # Reads treat a missing session as an empty cart; a session row is only
+        # written once the visitor actually changes their cart.
+        if create and not self._request.session.session_key:
             self._request.session.create()
         return self._request.session.session_key
 
@@ -24,101 +60,241 @@ class CartService:
             return self._request.user
         return None
 
-    def get_cart(self) -> Optional[Cart]:
-        return self._cart_repo.get_cart_with_items(
-            session_key=self._get_session_key(),
-            user=self._get_user()
-        )
+    def _get_owner(self, create: bool = False) -> Optional[CartOwner]:
+        user = self._get_user()
+        if user:
+            return CartOwner(user=user)
 
-    def get_or_create_cart(self) -> Cart:
-        return self._cart_repo.get_or_create_cart(
-            session_key=self._get_session_key(),
-            user=self._get_user()
-        )
+        session_key = self._get_session_key(create=create)
+        if not session_key:
+            return None
+
+        if create and self._request.session.get(CART_SESSION_KEY) != session_key:
+            self._request.session[CART_SESSION_KEY] = session_key
+        return CartOwner(session_key=session_key)
 
     def get_cart_dto(self) -> CartDTO:
-        cart = self.get_cart()
-        if not cart:
+        owner = self._get_owner()
+        if owner is None:
             return CartDTO.empty()
-        return CartDTO.from_cart(cart)
+        self._flush_pending(owner)
+        return self._storage.get_cart_dto(owner)
+
+    def get_lines(self) -> list[CartLine]:
+        owner = self._get_owner()
+        if owner is None:
+            return []
+        self._flush_pending(owner)
+        return self._storage.get_lines(owner)
+
+    @staticmethod
+    def _pending_cache_key(owner: CartOwner) -> str:
+        return f'cart:pending:{owner.key}'
+
+    @contextmanager
+    def _pending_lock(self, owner: CartOwner):
+        # Every read-modify-write of the buffer happens under this lock, so a
+        # flush can never run between an increment reading the buffer and
+        # writing it back, which would apply the same deltas twice.
+        lock_key = f'cart:pending-lock:{owner.key}'
+        deadline = time.monotonic() + CART_PENDING_LOCK_WAIT
+        while not cache.add(lock_key, True, CART_PENDING_LOCK_TIMEOUT):
+            if time.monotonic() >= deadline:
+                yield False
+                return
+            time.sleep(0.01)
+
+        try:
+            yield True
+        finally:
+            cache.delete(lock_key)
+
+    def _apply_pending(self, owner: CartOwner) -> None:
+        cache_key = self._pending_cache_key(owner)
+        pending = cache.get(cache_key)
+        if not pending:
+            return
+
+        cache.delete(cache_key)
+        for (product_id, size), delta in pending['deltas'].items():
+            if delta:
+                self._storage.increment_item_quantity(owner, product_id, size, delta)
+        # The summary was taken from the buffered snapshot; the stored cart is
+        # authoritative again once the deltas are written.
+        cache.delete(self._summary_cache_key(owner))
+
+    def _flush_pending(self, owner: CartOwner) -> None:
+        if not write_behind_enabled() or cache.get(self._pending_cache_key(owner)) is None:
+            return
+
+        with self._pending_lock(owner) as locked:
+            if locked:
+                self._apply_pending(owner)
+
+    def flush_pending(self) -> None:
+        owner = self._get_owner()
+        if owner is not None:
+            self._flush_pending(owner)
+
+    @staticmethod
+    def _summary_cache_key(owner: Optional[CartOwner]) -> Optional[str]:
+        if owner is None:
+            return None
+        return f'cart:summary:{owner.key}'
+
+    def _store_summary(self, summary: CartSummaryDTO) -> CartSummaryDTO:
+        cache_key = self._summary_cache_key(self._get_owner())
+        if cache_key:
+            cache.set(cache_key, summary, CART_SUMMARY_CACHE_TIMEOUT)
+        return summary
+
+    def _refresh_cart(self, owner: CartOwner) -> CartDTO:
+        # The lines read after a mutation feeds both the rendered fragment and
+        # the cached summary, so the client never has to re-fetch the cart.
+        cart_dto = self._storage.get_cart_dto(owner)
+        self._store_summary(CartSummaryDTO.from_cart_dto(cart_dto))
+        return cart_dto
+
+    def reset_summary(self) -> None:
+        cache_key = self._summary_cache_key(self._get_owner())
+        if cache_key:
+            cache.delete(cache_key)
+
+    def get_cart_summary(self) -> CartSummaryDTO:
+        owner = self._get_owner()
+        cache_key = self._summary_cache_key(owner)
+        if cache_key is None:
+            return CartSummaryDTO.empty()
+
+        if write_behind_enabled():
+            pending = cache.get(self._pending_cache_key(owner))
+            if pending and time.time() - pending['updated_at'] > CART_WRITE_BEHIND_DELAY:
+                self._flush_pending(owner)
+
+        summary = cache.get(cache_key)
+        if summary is None:
+            summary = self._storage.get_summary(owner)
+            cache.set(cache_key, summary, CART_SUMMARY_CACHE_TIMEOUT)
+        return summary
 
     def get_cart_count(self) -> int:
-        cart = self.get_cart()
-        if not cart:
-            return 0
-        return cart.total_items
+        return self.get_cart_summary().total_items
 
     def add_item(self, dto: AddToCartDTO) -> CartDTO:
-        product = get_object_or_404(Product, id=dto.product_id)
-        cart = self.get_or_create_cart()
+        owner = self._get_owner(create=True)
+        self._flush_pending(owner)
 
-        self._item_repo.add_item(
-            cart=cart,
-            product=product,
-            size=dto.size,
-            quantity=dto.quantity
-        )
+        added = self._storage.add_item(owner, dto.product_id, dto.size, dto.quantity)
+        if not added:
+            raise Http404('Product not found')
 
-        cart.refresh_from_db()
-        return self.get_cart_dto()
+        return self._refresh_cart(owner)
 
     def update_item_quantity(self, dto: UpdateCartItemDTO) -> CartDTO:
-        cart = self.get_cart()
-        if not cart:
+        owner = self._get_owner()
+        if owner is None:
             return CartDTO.empty()
 
-        product = get_object_or_404(Product, id=dto.product_id)
-        item = self._item_repo.get_item(cart, product, dto.size)
-
-        if item:
-            if dto.quantity <= 0:
-                self._item_repo.remove_item(item)
-            else:
-                self._item_repo.update_item_quantity(item, dto.quantity)
-
-        return self.get_cart_dto()
+        self._flush_pending(owner)
+        self._storage.update_item_quantity(owner, dto.product_id, dto.size, dto.quantity)
+        return self._refresh_cart(owner)
 
     def increment_item(self, product_id: int, size: str, delta: int) -> CartDTO:
-        cart = self.get_cart()
-        if not cart:
+        owner = self._get_owner()
+        if owner is None:
             return CartDTO.empty()
 
-        product = get_object_or_404(Product, id=product_id)
-        item = self._item_repo.get_item(cart, product, size)
+        if not write_behind_enabled():
+            self._storage.increment_item_quantity(owner, product_id, size, delta)
+            return self._refresh_cart(owner)
+
+        with self._pending_lock(owner) as locked:
+            if not locked:
+                # Only reached when a holder died mid-flush. Writing through is
+                # safe because deltas add up; the stored cart misses what is
+                # still buffered, so the buffered view is shown instead.
+                self._storage.increment_item_quantity(owner, product_id, size, delta)
+                pending = cache.get(self._pending_cache_key(owner))
+                if pending is None:
+                    return self._refresh_cart(owner)
+                cart_dto, _ = pending['cart'].with_quantity_delta(product_id, size, delta)
+                self._store_summary(CartSummaryDTO.from_cart_dto(cart_dto))
+                return cart_dto
+
+            cache_key = self._pending_cache_key(owner)
+            now = time.time()
+            pending = cache.get(cache_key)
+
+            if pending and (
+                now - pending['updated_at'] > CART_WRITE_BEHIND_DELAY
+                or now - pending['started_at'] > CART_WRITE_BEHIND_MAX_AGE
+            ):
+                self._apply_pending(owner)
+                pending = None
 
-        if item:
-            self._item_repo.increment_item_quantity(item, delta)
+            if pending is None:
+                pending = {
+                    'cart': self._storage.get_cart_dto(owner),
+                    'deltas': {},
+                    'started_at': now,
+                }
 
-        return self.get_cart_dto()
+            cart_dto, applied = pending['cart'].with_quantity_delta(product_id, size, delta)
+            if applied:
+                key = (product_id, size)
+                pending['deltas'][key] = pending['deltas'].get(key, 0) + applied
+
+            pending['cart'] = cart_dto
+            pending['updated_at'] = now
+            cache.set(cache_key, pending, CART_PENDING_CACHE_TIMEOUT)
+
+        self._store_summary(CartSummaryDTO.from_cart_dto(cart_dto))
+        return cart_dto
 
     def remove_item(self, dto: RemoveFromCartDTO) -> CartDTO:
-        cart = self.get_cart()
-        if not cart:
+        owner = self._get_owner()
+        if owner is None:
             return CartDTO.empty()
 
-        product = get_object_or_404(Product, id=dto.product_id)
-        item = self._item_repo.get_item(cart, product, dto.size)
+        self._flush_pending(owner)
+        self._storage.remove_item(owner, dto.product_id, dto.size)
+        return self._refresh_cart(owner)
 
-        if item:
-            self._item_repo.remove_item(item)
+    def apply_operations(self, operations: list[CartOperationDTO]) -> CartDTO:
+        product_ids = {operation.product_id for operation in operations}
+        known_ids = set(Product.objects.filter(id__in=product_ids).values_list('id', flat=True))
+        if product_ids - known_ids:
+            raise Http404('Product not found')
 
-        return self.get_cart_dto()
+        owner = self._get_owner(create=True)
+        self._flush_pending(owner)
+        self._storage.apply_operations(owner, operations)
+        return self._refresh_cart(owner)
 
     def clear_cart(self) -> CartDTO:
-        cart = self.get_cart()
-        if cart:
-            self._item_repo.clear_cart(cart)
+        owner = self._get_owner()
+        if owner is not None:
+            with self._pending_lock(owner):
+                cache.delete(self._pending_cache_key(owner))
+            self._storage.clear(owner)
+            self._store_summary(CartSummaryDTO.empty())
         return CartDTO.empty()
 
-    def merge_session_cart_to_user(self) -> None:
-        if not self._request.user.is_authenticated:
+    def merge_session_cart_to_user(self, user) -> None:
+        if not user or not user.is_authenticated:
             return
 
-        session_key = self._get_session_key()
-        session_cart = self._cart_repo.get_cart(session_key=session_key)
-
-        if not session_cart:
+        session_key = self._request.session.pop(CART_SESSION_KEY, None) or self._get_session_key()
+        if not session_key:
             return
 
-        user_cart = self._cart_repo.get_or_create_cart(user=self._request.user)
-        self._cart_repo.merge_carts(session_cart, user_cart)
+        source = CartOwner(session_key=session_key)
+        target = CartOwner(user=user)
+        self._flush_pending(source)
+        self._flush_pending(target)
+        self._storage.merge(source, target)
+
+        cache.delete_many([
+            self._summary_cache_key(source),
+            self._summary_cache_key(target),
+        ])
@@ -0,0 +1,10 @@
+from django.contrib.auth.signals import user_logged_in
+from django.dispatch import receiver
+
+from .services import CartService
+
+
+@receiver(user_logged_in)
+def merge_cart_on_login(sender, request, user, **kwargs) -> None:
+    if request is not None:
+        CartService(request).merge_session_cart_to_user(user)
@@ -0,0 +1,411 @@
+import threading
+import time
+from abc import ABC, abstractmethod
+from decimal import Decimal
+from functools import lru_cache
+from typing import Optional
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from .dto import CartDTO, CartItemDTO, CartLine, CartOperationDTO, CartOwner, CartSummaryDTO
+from .repositories import CartRepository, CartItemRepository
+from apps.catalog.models import Product
+
+
+class CartStorage(ABC):
+    @abstractmethod
+    def get_cart_dto(self, owner: CartOwner) -> CartDTO:
+        ...
+
+    @abstractmethod
+    def get_lines(self, owner: CartOwner) -> list[CartLine]:
+        ...
+
+    @abstractmethod
+    def get_summary(self, owner: CartOwner) -> CartSummaryDTO:
+        ...
+
+    @abstractmethod
+    def add_item(self, owner: CartOwner, product_id: int, size: str, quantity: int) -> bool:
+        ...
+
+    @abstractmethod
+    def update_item_quantity(self, owner: CartOwner, product_id: int, size: str, quantity: int) -> None:
+        ...
+
+    @abstractmethod
+    def increment_item_quantity(self, owner: CartOwner, product_id: int, size: str, delta: int) -> None:
+        ...
+
+    @abstractmethod
+    def remove_item(self, owner: CartOwner, product_id: int, size: str) -> None:
+        ...
+
+    @abstractmethod
+    def apply_operations(self, owner: CartOwner, operations: list[CartOperationDTO]) -> None:
+        ...
+
+    @abstractmethod
+    def clear(self, owner: CartOwner) -> None:
+        ...
+
+    @abstractmethod
+    def merge(self, source: CartOwner, target: CartOwner) -> None:
+        ...
+
+
+class DatabaseCartStorage(CartStorage):
+    def __init__(self):
+        self._cart_repo = CartRepository()
+        self._item_repo = CartItemRepository()
+
+    def _get_items(self, owner: CartOwner):
+        return self._item_repo.get_items(session_key=owner.session_key, user=owner.user)
+
+    def get_cart_dto(self, owner: CartOwner) -> CartDTO:
+        return CartDTO.from_items(self._item_repo.get_lines(self._get_items(owner)))
+
+    def get_lines(self, owner: CartOwner) -> list[CartLine]:
+        return self._item_repo.get_cart_lines(self._get_items(owner))
+
+    def get_summary(self, owner: CartOwner) -> CartSummaryDTO:
+        return self._cart_repo.get_summary(session_key=owner.session_key, user=owner.user)
+
+    def add_item(self, owner: CartOwner, product_id: int, size: str, quantity: int) -> bool:
+        cart = self._cart_repo.get_or_create_cart(session_key=owner.session_key, user=owner.user)
+        return self._item_repo.add_item(cart.id, product_id, size, quantity)
+
+    def update_item_quantity(self, owner: CartOwner, product_id: int, size: str, quantity: int) -> None:
+        if quantity <= 0:
+            self.remove_item(owner, product_id, size)
+        else:
+            self._item_repo.update_item_quantity(self._get_items(owner), product_id, size, quantity)
+
+    def increment_item_quantity(self, owner: CartOwner, product_id: int, size: str, delta: int) -> None:
+        self._item_repo.increment_item_quantity(self._get_items(owner), product_id, size, delta)
+
+    def remove_item(self, owner: CartOwner, product_id: int, size: str) -> None:
+        self._item_repo.remove_item(self._get_items(owner), product_id, size)
+
+    def apply_operations(self, owner: CartOwner, operations: list[CartOperationDTO]) -> None:
+        cart = self._cart_repo.get_or_create_cart(session_key=owner.session_key, user=owner.user)
+        self._item_repo.apply_operations(cart, operations)
+
+    def clear(self, owner: CartOwner) -> None:
+        self._item_repo.clear_cart(self._get_items(owner))
+
+    def merge(self, source: CartOwner, target: CartOwner) -> None:
+        session_cart = self._cart_repo.get_cart(session_key=source.session_key)
+        if not session_cart:
+            return
+
+        user_cart = self._cart_repo.get_cart(user=target.user)
+        if user_cart:
+            self._cart_repo.merge_carts(session_cart, user_cart)
+        else:
+            self._cart_repo.assign_to_user(session_cart, target.user)
+
+
+class InMemoryHashStore:
+    def __init__(self):
+        self._hashes: dict[str, dict[str, int]] = {}
+        self._expires: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, key: str) -> Optional[dict[str, int]]:
+        if self._expires.get(key, 0) < time.monotonic():
+            self._hashes.pop(key, None)
+            self._expires.pop(key, None)
+        return self._hashes.get(key)
+
+    def _set(self, key: str, mapping: dict[str, int], timeout: int) -> None:
+        self._hashes[key] = mapping
+        self._expires[key] = time.monotonic() + timeout
+
+    def get_all(self, key: str) -> dict[str, int]:
+        with self._lock:
+            return dict(self._get(key) or {})
+
+    def incr(self, key: str, field: str, amount: int, timeout: int) -> int:
+        with self._lock:
+            mapping = self._get(key) or {}
+            mapping[field] = mapping.get(field, 0) + amount
+            self._set(key, mapping, timeout)
+            return mapping[field]
+
+    def incr_existing(self, key: str, field: str, amount: int, minimum: int, timeout: int) -> Optional[int]:
+        with self._lock:
+            mapping = self._get(key)
+            if not mapping or field not in mapping:
+                return None
+            mapping[field] = max(mapping[field] + amount, minimum)
+            self._set(key, mapping, timeout)
+            return mapping[field]
+
+    def set_existing(self, key: str, field: str, value: int, timeout: int) -> bool:
+        with self._lock:
+            mapping = self._get(key)
+            if not mapping or field not in mapping:
+                return False
+            mapping[field] = value
+            self._set(key, mapping, timeout)
+            return True
+
+    def remove(self, key: str, *fields: str) -> None:
+        with self._lock:
+            mapping = self._get(key)
+            for field in fields:
+                if mapping:
+                    mapping.pop(field, None)
+
+    @staticmethod
+    def _line(field: str) -> tuple[int, str]:
+        product_id, size = field.split(':', 1)
+        return int(product_id), size
+
+    def apply(self, key: str, operations: list[tuple[str, str, int]], timeout: int) -> None:
+        # Stands in for RedisHashStore.APPLY_SCRIPT, so it folds with the same
+        # rules the database storage uses.
+        with self._lock:
+            mapping = self._get(key) or {}
+            quantities = CartOperationDTO.fold(
+                {self._line(field): quantity for field, quantity in mapping.items()},
+                [
+                    CartOperationDTO(op, *self._line(field), quantity)
+                    for op, field, quantity in operations
+                ],
+            )
+            mapping = {
+                f'{product_id}:{size}': quantity
+                for (product_id, size), quantity in quantities.items()
+                if quantity > 0
+            }
+
+            if mapping:
+                self._set(key, mapping, timeout)
+            else:
+                self._hashes.pop(key, None)
+                self._expires.pop(key, None)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._hashes.pop(key, None)
+            self._expires.pop(key, None)
+
+    def merge(self, source_key: str, target_key: str, timeout: int) -> None:
+        with self._lock:
+            source = self._get(source_key)
+            if not source:
+                return
+
+            target = self._get(target_key) or {}
+            for field, quantity in source.items():
+                target[field] = target.get(field, 0) + quantity
+            self._set(target_key, target, timeout)
+            self._hashes.pop(source_key, None)
+            self._expires.pop(source_key, None)
+
+
+class RedisHashStore:
+    INCR_EXISTING_SCRIPT = """
+        local current = redis.call('HGET', KEYS[1], ARGV[1])
+        if not current then
+            return nil
+        end
+        local value = math.max(tonumber(current) + tonumber(ARGV[2]), tonumber(ARGV[3]))
+        redis.call('HSET', KEYS[1], ARGV[1], value)
+        redis.call('EXPIRE', KEYS[1], ARGV[4])
+        return value
+    """
+
+    SET_EXISTING_SCRIPT = """
+        if redis.call('HEXISTS', KEYS[1], ARGV[1]) == 0 then
+            return 0
+        end
+        redis.call('HSET', KEYS[1], ARGV[1], ARGV[2])
+        redis.call('EXPIRE', KEYS[1], ARGV[3])
+        return 1
+    """
+
+    MERGE_SCRIPT = """
+        local lines = redis.call('HGETALL', KEYS[1])
+        if #lines == 0 then
+            return 0
+        end
+        for i = 1, #lines, 2 do
+            redis.call('HINCRBY', KEYS[2], lines[i], lines[i + 1])
+        end
+        redis.call('DEL', KEYS[1])
+        redis.call('EXPIRE', KEYS[2], ARGV[1])
+        return #lines / 2
+    """
+
+    # A port of CartOperationDTO.fold. Operations arrive as flat (op, field,
+    # quantity) triples with the timeout last, and are folded in one script so
+    # concurrent batches cannot overwrite each other.
+    APPLY_SCRIPT = """
+        for i = 1, #ARGV - 1, 3 do
+            local op, field, quantity = ARGV[i], ARGV[i + 1], tonumber(ARGV[i + 2])
+            local current = tonumber(redis.call('HGET', KEYS[1], field) or '0')
+            if op == 'add' then
+                redis.call('HINCRBY', KEYS[1], field, quantity)
+            elseif op == 'remove' then
+                redis.call('HDEL', KEYS[1], field)
+            elseif current == 0 then
+            elseif op == 'update' and quantity <= 0 then
+                redis.call('HDEL', KEYS[1], field)
+            elseif op == 'update' then
+                redis.call('HSET', KEYS[1], field, quantity)
+            elseif op == 'increment' then
+                redis.call('HSET', KEYS[1], field, math.max(1, current + quantity))
+            end
+        end
+        redis.call('EXPIRE', KEYS[1], ARGV[#ARGV])
+        return redis.call('HLEN', KEYS[1])
+    """
+
+    def __init__(self, url: str):
+        import redis
+
+        self._client = redis.Redis.from_url(url, decode_responses=True)
+        self._incr_existing = self._client.register_script(self.INCR_EXISTING_SCRIPT)
+        self._set_existing = self._client.register_script(self.SET_EXISTING_SCRIPT)
+        self._merge = self._client.register_script(self.MERGE_SCRIPT)
+        self._apply = self._client.register_script(self.APPLY_SCRIPT)
+
+    def get_all(self, key: str) -> dict[str, int]:
+        return {field: int(value) for field, value in self._client.hgetall(key).items()}
+
+    def incr(self, key: str, field: str, amount: int, timeout: int) -> int:
+        with self._client.pipeline() as pipe:
+            pipe.hincrby(key, field, amount)
+            pipe.expire(key, timeout)
+            value, _ = pipe.execute()
+        return value
+
+    def incr_existing(self, key: str, field: str, amount: int, minimum: int, timeout: int) -> Optional[int]:
+        return self._incr_existing(keys=[key], args=[field, amount, minimum, timeout])
+
+    def set_existing(self, key: str, field: str, value: int, timeout: int) -> bool:
+        return bool(self._set_existing(keys=[key], args=[field, value, timeout]))
+
+    def remove(self, key: str, *fields: str) -> None:
+        self._client.hdel(key, *fields)
+
+    def apply(self, key: str, operations: list[tuple[str, str, int]], timeout: int) -> None:
+        self._apply(keys=[key], args=[*(value for operation in operations for value in operation), timeout])
+
+    def delete(self, key: str) -> None:
+        self._client.delete(key)
+
+    def merge(self, source_key: str, target_key: str, timeout: int) -> None:
+        self._merge(keys=[source_key, target_key], args=[timeout])
+
+
+class KeyValueCartStorage(CartStorage):
+    # Each cart is one hash of "<product_id>:<size>" -> quantity. Product data
+    # still comes from the catalog tables; only the cart lines live here.
+
+    def __init__(self, store, timeout: int):
+        self._store = store
+        self._timeout = timeout
+
+    @staticmethod
+    def _key(owner: CartOwner) -> str:
+        return f'cart:lines:{owner.key}'
+
+    @staticmethod
+    def _field(product_id: int, size: str) -> str:
+        return f'{product_id}:{size}'
+
+    def get_lines(self, owner: CartOwner) -> list[CartLine]:
+        lines = []
+        for field, quantity in self._store.get_all(self._key(owner)).items():
+            product_id, size = field.split(':', 1)
+            lines.append(CartLine(product_id=int(product_id), size=size, quantity=int(quantity)))
+        return lines
+
+    def get_cart_dto(self, owner: CartOwner) -> CartDTO:
+        lines = self.get_lines(owner)
+        if not lines:
+            return CartDTO.empty()
+
+        products = Product.objects.prefetch_related('images').in_bulk(
+            [line.product_id for line in lines]
+        )
+        return CartDTO(items=[
+            CartItemDTO.from_product(products[line.product_id], line.size, line.quantity)
+            for line in lines
+            if line.product_id in products
+        ])
+
+    def get_summary(self, owner: CartOwner) -> CartSummaryDTO:
+        lines = self.get_lines(owner)
+        if not lines:
+            return CartSummaryDTO.empty()
+
+        prices = dict(
+            Product.objects
+            .filter(id__in=[line.product_id for line in lines])
+            .values_list('id', 'price')
+        )
+        lines = [line for line in lines if line.product_id in prices]
+        return CartSummaryDTO(
+            total_items=sum(line.quantity for line in lines),
+            subtotal=sum((prices[line.product_id] * line.quantity for line in lines), Decimal('0.00')),
+        )
+
+    def add_item(self, owner: CartOwner, product_id: int, size: str, quantity: int) -> bool:
+        if not Product.objects.filter(id=product_id).exists():
+            return False
+
+        self._store.incr(self._key(owner), self._field(product_id, size), quantity, self._timeout)
+        return True
+
+    def update_item_quantity(self, owner: CartOwner, product_id: int, size: str, quantity: int) -> None:
+        if quantity <= 0:
+            self.remove_item(owner, product_id, size)
+        else:
+            self._store.set_existing(
+                self._key(owner), self._field(product_id, size), quantity, self._timeout
+            )
+
+    def increment_item_quantity(self, owner: CartOwner, product_id: int, size: str, delta: int) -> None:
+        self._store.incr_existing(
+            self._key(owner), self._field(product_id, size), delta, 1, self._timeout
+        )
+
+    def remove_item(self, owner: CartOwner, product_id: int, size: str) -> None:
+        self._store.remove(self._key(owner), self._field(product_id, size))
+
+    def apply_operations(self, owner: CartOwner, operations: list[CartOperationDTO]) -> None:
+        self._store.apply(
+            self._key(owner),
+            [
+                (operation.op, self._field(operation.product_id, operation.size), operation.quantity)
+                for operation in operations
+            ],
+            self._timeout,
+        )
+
+    def clear(self, owner: CartOwner) -> None:
+        self._store.delete(self._key(owner))
+
+    def merge(self, source: CartOwner, target: CartOwner) -> None:
+        self._store.merge(self._key(source), self._key(target), self._timeout)
+
+
+class InMemoryCartStorage(KeyValueCartStorage):
+    def __init__(self):
+        super().__init__(InMemoryHashStore(), settings.CART_STORAGE_TIMEOUT)
+
+
+class RedisCartStorage(KeyValueCartStorage):
+    def __init__(self):
+        super().__init__(RedisHashStore(settings.CART_STORAGE_LOCATION), settings.CART_STORAGE_TIMEOUT)
+
+
+@lru_cache(maxsize=None)
+def get_cart_storage() -> CartStorage:
+    return import_string(settings.CART_STORAGE_BACKEND)()
@@ -8,6 +8,8 @@ urlpatterns = [
     path('add/<int:product_id>/', views.add_to_cart, name='add'),
     path('update/<int:product_id>/', views.update_cart_item, name='update'),
     path('remove/<int:product_id>/', views.remove_from_cart, name='remove'),
+    path('batch/', views.batch_update_cart, name='batch'),
+    path('flush/', views.flush_cart, name='flush'),
     path('clear/', views.clear_cart, name='clear'),
     path('count/', views.get_cart_count, name='count'),
 ]
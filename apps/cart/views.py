@@ -1,9 +1,14 @@
+import json
+
 from django.http import HttpRequest, HttpResponse
 from django.shortcuts import render
 from django.views.decorators.http import require_http_methods, require_GET, require_POST
 
-from .services import CartService
-from .dto import AddToCartDTO, UpdateCartItemDTO, RemoveFromCartDTO
+from .services import CART_WRITE_BEHIND_DELAY, CartService, write_behind_enabled
+from .dto import CartDTO, CartOperationDTO, AddToCartDTO, UpdateCartItemDTO, RemoveFromCartDTO
+
+
+CART_BATCH_MAX_OPERATIONS = 50
 
 
 @require_GET
@@ -16,6 +21,15 @@ def cart_modal(request: HttpRequest) -> HttpResponse:
     })
 
 
+def _cart_mutation_response(request: HttpRequest, cart_dto: CartDTO, buffered: bool = False) -> HttpResponse:
+    response = render(request, 'cart/partials/cart_mutation_response.html', {
+        'cart': cart_dto,
+        'flush_delay': CART_WRITE_BEHIND_DELAY if buffered else None,
+    })
+    response['HX-Trigger'] = f'{{"cartUpdated": {{"count": {cart_dto.total_items}}}}}'
+    return response
+
+
 @require_POST
 def add_to_cart(request: HttpRequest, product_id: int) -> HttpResponse:
     size = request.POST.get('size')
@@ -28,9 +42,7 @@ def add_to_cart(request: HttpRequest, product_id: int) -> HttpResponse:
     dto = AddToCartDTO(product_id=product_id, size=size, quantity=quantity)
     cart_dto = service.add_item(dto)
 
-    response = HttpResponse('')
-    response['HX-Trigger'] = f'{{"cartUpdated": {{"count": {cart_dto.total_items}}}}}'
-    return response
+    return _cart_mutation_response(request, cart_dto)
 
 
 @require_POST
@@ -49,10 +61,9 @@ def update_cart_item(request: HttpRequest, product_id: int) -> HttpResponse:
         cart_dto = service.update_item_quantity(dto)
     else:
         cart_dto = service.increment_item(product_id, size, delta)
+        return _cart_mutation_response(request, cart_dto, buffered=write_behind_enabled())
 
-    response = HttpResponse('')
-    response['HX-Trigger'] = f'{{"cartUpdated": {{"count": {cart_dto.total_items}}}}}'
-    return response
+    return _cart_mutation_response(request, cart_dto)
 
 
 @require_POST
@@ -65,9 +76,7 @@ def remove_from_cart(request: HttpRequest, product_id: int) -> HttpResponse:
     dto = RemoveFromCartDTO(product_id=product_id, size=size)
     cart_dto = service.remove_item(dto)
 
-    response = HttpResponse('')
-    response['HX-Trigger'] = f'{{"cartUpdated": {{"count": {cart_dto.total_items}}}}}'
-    return response
+    return _cart_mutation_response(request, cart_dto)
 
 
 @require_POST
@@ -75,9 +84,32 @@ def clear_cart(request: HttpRequest) -> HttpResponse:
     service = CartService(request)
     cart_dto = service.clear_cart()
 
-    response = HttpResponse('')
-    response['HX-Trigger'] = '{"cartUpdated": {"count": 0}}'
-    return response
+    return _cart_mutation_response(request, cart_dto)
+
+
+@require_POST
+def batch_update_cart(request: HttpRequest) -> HttpResponse:
+    try:
+        payload = json.loads(request.body)
+        operations = [CartOperationDTO.from_dict(data) for data in payload['operations']]
+    except (json.JSONDecodeError, KeyError, TypeError, ValueError):
+        return HttpResponse('Invalid operations', status=400)
+
+    if not operations:
+        return HttpResponse('No operations', status=400)
+    if len(operations) > CART_BATCH_MAX_OPERATIONS:
+        return HttpResponse('Too many operations', status=400)
+
+    service = CartService(request)
+    cart_dto = service.apply_operations(operations)
+
+    return _cart_mutation_response(request, cart_dto)
+
+
+@require_POST
+def flush_cart(request: HttpRequest) -> HttpResponse:
+    CartService(request).flush_pending()
+    return HttpResponse(status=204)
 
 
 def get_cart_count(request: HttpRequest) -> HttpResponse:
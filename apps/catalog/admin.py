@@ -3,7 +3,7 @@ from django.db.models import QuerySet
 from django.http import HttpRequest
 from django.utils.html import format_html
 
-from .models import Category, Product, ProductImage
+from .models import Category, Product, ProductImage, ProductStock
 
 
 class ProductImageInline(admin.TabularInline):
@@ -22,15 +22,35 @@ class ProductImageInline(admin.TabularInline):
     image_preview.short_description = 'Preview'
 
 
+class ProductStockInline(admin.TabularInline):
+    model = ProductStock
+    extra = 0
+    fields = ['size', 'quantity', 'updated_at']
+    readonly_fields = ['updated_at']
+
+
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
-    list_display = ['name', 'slug', 'product_count', 'created_at']
+    list_display = ['tree_name', 'slug', 'parent', 'product_count', 'created_at']
+    list_filter = ['depth']
     search_fields = ['name', 'description']
     prepopulated_fields = {'slug': ('name',)}
+    fields = ['parent', 'name', 'slug', 'description', 'path']
+    readonly_fields = ['path']
+
+    def tree_name(self, obj: Category) -> str:
+        return format_html('{}{}', '— ' * obj.depth, obj.name)
+    tree_name.short_description = 'Name'
+    tree_name.admin_order_field = 'path'
 
     def product_count(self, obj: Category) -> int:
-        return obj.products.count()
+        return obj.direct_product_count
     product_count.short_description = 'Products'
+    product_count.admin_order_field = 'direct_product_count'
+
+    def get_queryset(self, request: HttpRequest) -> QuerySet:
+        qs = super().get_queryset(request)
+        return qs.select_related('parent').with_product_counts()
 
 
 @admin.register(Product)
@@ -53,7 +73,7 @@ class ProductAdmin(admin.ModelAdmin):
     ]
     search_fields = ['name', 'brand', 'description', 'color']
     prepopulated_fields = {'slug': ('name',)}
-    inlines = [ProductImageInline]
+    inlines = [ProductImageInline, ProductStockInline]
     list_per_page = 25
 
     fieldsets = [
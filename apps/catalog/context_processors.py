@@ -0,0 +1,9 @@
+from django.http import HttpRequest
+
+from .services import CategoryService
+
+
+def navigation_context(request: HttpRequest) -> dict:
+    return {
+        'navigation_categories': CategoryService.get_navigation().roots,
+    }
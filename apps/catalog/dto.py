@@ -0,0 +1,36 @@
+from dataclasses import dataclass, field
+from typing import Optional
+
+
+@dataclass(frozen=True)
+class CategoryNodeDTO:
+    id: int
+    parent_id: Optional[int]
+    name: str
+    slug: str
+    path: str
+    depth: int
+    product_count: int
+    children: tuple['CategoryNodeDTO', ...] = ()
+
+
+@dataclass(frozen=True)
+class CategoryNavigationDTO:
+    roots: tuple[CategoryNodeDTO, ...]
+    by_slug: dict[str, CategoryNodeDTO] = field(default_factory=dict)
+    by_id: dict[int, CategoryNodeDTO] = field(default_factory=dict)
+
+    def get(self, slug: str) -> Optional[CategoryNodeDTO]:
+        return self.by_slug.get(slug)
+
+    def get_trail(self, node: CategoryNodeDTO) -> list[CategoryNodeDTO]:
+        trail = []
+        current = node
+        while current is not None:
+            trail.append(current)
+            current = self.by_id.get(current.parent_id)
+        return list(reversed(trail))
+
+    @classmethod
+    def empty(cls) -> 'CategoryNavigationDTO':
+        return cls(roots=())
@@ -1,24 +1,101 @@
-from django.db import models
+from django.core.exceptions import ValidationError
+from django.db import models, transaction
+from django.db.models import Count, F, Value
+from django.db.models.functions import Concat, Substr
 from django.utils.text import slugify
 
+SIZES = [
+    ('XS', 'Extra Small'),
+    ('S', 'Small'),
+    ('M', 'Medium'),
+    ('L', 'Large'),
+    ('XL', 'Extra Large'),
+]
+
+class CategoryQuerySet(models.QuerySet):
+    def roots(self) -> 'CategoryQuerySet':
+        return self.filter(parent__isnull=True)
+
+    def with_product_counts(self) -> 'CategoryQuerySet':
+        return self.annotate(direct_product_count=Count('products'))
+
 class Category(models.Model):
+    PATH_SEPARATOR = '/'
+    PATH_STEP_WIDTH = 6
+
+    parent = models.ForeignKey(
+        'self',
+        related_name='children',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True
+    )
     name = models.CharField(max_length=100)
     slug = models.SlugField(unique=True, blank=True)
     description = models.TextField(blank=True)
+    path = models.CharField(max_length=255, db_index=True, editable=False)
+    depth = models.PositiveSmallIntegerField(default=0, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = CategoryQuerySet.as_manager()
+
     class Meta:
         verbose_name_plural = 'Categories'
+        ordering = ['path']
+
+    def clean(self):
+        if self.pk and self.parent_id and self.parent.path.startswith(self.path):
+            raise ValidationError({'parent': 'A category cannot be nested under itself or its subcategories.'})
 
     def save(self, *args, **kwargs):
         if not self.slug:
             self.slug = slugify(self.name)
-        super().save(*args, **kwargs)
+
+        with transaction.atomic():
+            old_path = self.path
+            super().save(*args, **kwargs)
+
+            new_path = self.build_path()
+            if new_path != old_path:
+                self._move_subtree(old_path, new_path)
+
+    def build_path(self) -> str:
+        prefix = self.parent.path if self.parent_id else ''
+        return f"{prefix}{self.pk:0{self.PATH_STEP_WIDTH}d}{self.PATH_SEPARATOR}"
+
+    def _move_subtree(self, old_path: str, new_path: str) -> None:
+        new_depth = new_path.count(self.PATH_SEPARATOR) - 1
+        Category.objects.filter(pk=self.pk).update(path=new_path, depth=new_depth)
+
+        if old_path:
+            (
+                Category.objects
+                .filter(path__startswith=old_path)
+                .exclude(pk=self.pk)
+                .update(
+                    path=Concat(Value(new_path), Substr('path', len(old_path) + 1)),
+                    depth=F('depth') + (new_depth - self.depth),
+                )
+            )
+
+        self.path = new_path
+        self.depth = new_depth
+
+    def get_descendants(self, include_self: bool = True) -> CategoryQuerySet:
+        categories = Category.objects.filter(path__startswith=self.path)
+        if not include_self:
+            categories = categories.exclude(pk=self.pk)
+        return categories
 
     def __str__(self):
         return self.name
 
+class ProductQuerySet(models.QuerySet):
+    def in_category(self, category) -> 'ProductQuerySet':
+        return self.filter(category__path__startswith=category.path)
+
+
 class Product(models.Model):
     category = models.ForeignKey(Category, related_name='products', on_delete=models.CASCADE)
     name = models.CharField(max_length=200)
@@ -47,6 +124,8 @@ class Product(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = ProductQuerySet.as_manager()
+
     def save(self, *args, **kwargs):
         if not self.slug:
             self.slug = slugify(self.name)
@@ -62,4 +141,16 @@ class ProductImage(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
-        return f"Image for {self.product.name}"
\ No newline at end of file
+        return f"Image for {self.product.name}"
+
+class ProductStock(models.Model):
+    product = models.ForeignKey(Product, related_name='stock', on_delete=models.CASCADE)
+    size = models.CharField(max_length=5, choices=SIZES)
+    quantity = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ['product', 'size']
+
+    def __str__(self):
+        return f"{self.product.name} ({self.size}): {self.quantity}"
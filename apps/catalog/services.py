@@ -0,0 +1,79 @@
+import time
+
+from django.core.cache import cache
+
+from .dto import CategoryNodeDTO, CategoryNavigationDTO
+from .models import Category
+
+
+NAVIGATION_CACHE_KEY = 'catalog:navigation'
+NAVIGATION_CACHE_TIMEOUT = 60 * 60
+NAVIGATION_LOCAL_TIMEOUT = 30
+
+_local_navigation: dict = {'value': None, 'expires_at': 0.0}
+
+
+class CategoryService:
+    @staticmethod
+    def get_navigation() -> CategoryNavigationDTO:
+        now = time.monotonic()
+        navigation = _local_navigation['value']
+        if navigation is not None and _local_navigation['expires_at'] > now:
+            return navigation
+
+        navigation = cache.get(NAVIGATION_CACHE_KEY)
+        if navigation is None:
+            navigation = CategoryService.build_navigation()
+            cache.set(NAVIGATION_CACHE_KEY, navigation, NAVIGATION_CACHE_TIMEOUT)
+
+        _local_navigation['value'] = navigation
+        _local_navigation['expires_at'] = now + NAVIGATION_LOCAL_TIMEOUT
+        return navigation
+
+    @staticmethod
+    def invalidate_navigation() -> None:
+        _local_navigation['value'] = None
+        cache.delete(NAVIGATION_CACHE_KEY)
+
+    @staticmethod
+    def build_navigation() -> CategoryNavigationDTO:
+        rows = list(
+            Category.objects
+            .with_product_counts()
+            .order_by('path')
+            .values('id', 'parent_id', 'name', 'slug', 'path', 'depth', 'direct_product_count')
+        )
+
+        subtree_counts = {row['id']: row['direct_product_count'] for row in rows}
+        children: dict[int, list[CategoryNodeDTO]] = {}
+        by_slug = {}
+        by_id = {}
+        roots = []
+
+        # Rows are ordered by path, so walking them backwards visits every
+        # subcategory before its parent.
+        for row in reversed(rows):
+            node = CategoryNodeDTO(
+                id=row['id'],
+                parent_id=row['parent_id'],
+                name=row['name'],
+                slug=row['slug'],
+                path=row['path'],
+                depth=row['depth'],
+                product_count=subtree_counts[row['id']],
+                children=tuple(reversed(children.pop(row['id'], []))),
+            )
+            by_slug[node.slug] = node
+            by_id[node.id] = node
+
+            if node.parent_id in subtree_counts:
+                subtree_counts[node.parent_id] += node.product_count
+                children.setdefault(node.parent_id, []).append(node)
+            else:
+                roots.append(node)
+
+        return CategoryNavigationDTO(
+            roots=tuple(reversed(roots)),
+            by_slug=by_slug,
+            by_id=by_id,
+        )
@@ -0,0 +1,18 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Category, Product
+from .services import CategoryService
+from services.lookup_cache import NegativeLookupCache
+
+
+@receiver([post_save, post_delete], sender=Category)
+@receiver([post_save, post_delete], sender=Product)
+def invalidate_category_navigation(sender, **kwargs) -> None:
+    transaction.on_commit(CategoryService.invalidate_navigation)
+
+
+@receiver(post_save, sender=Product)
+def forget_missing_product(sender, instance: Product, **kwargs) -> None:
+    NegativeLookupCache.forget(NegativeLookupCache.PRODUCTS, instance.slug)
@@ -6,5 +6,6 @@ app_name = 'catalog'
 urlpatterns = [
     path('', views.product_list, name='product_list'),
     path('product/<slug:slug>/', views.product_detail, name='product_detail'),
+    path('product/<slug:slug>/related/', views.related_products, name='related_products'),
     path('search/', views.search_products, name='search_products'),
 ]
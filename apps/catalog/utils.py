@@ -1,5 +1,17 @@
+from typing import Optional
+
 from django.http import HttpRequest
 
+from .models import ProductImage
+
 
 def is_htmx(request: HttpRequest) -> bool:
     return request.headers.get('HX-Request') == 'true'
+
+
+def get_main_image(product) -> Optional[ProductImage]:
+    images = list(product.images.all())
+    for image in images:
+        if image.is_main:
+            return image
+    return images[0] if images else None
@@ -1,41 +1,51 @@
 from django.shortcuts import render, get_object_or_404
 from django.http import HttpRequest, HttpResponse
 from django.core.paginator import Paginator
+from django.template.loader import render_to_string
+from django.views.decorators.cache import cache_page
+from django.db.models import Count, QuerySet
+from collections import Counter
 from decimal import Decimal
 
-from .models import Product, Category
-from .utils import is_htmx
-from apps.cart.services import CartService
+from .models import SIZES, Product, Category
+from .services import CategoryService
+from .utils import is_htmx, get_main_image
+from services.lookup_cache import NegativeLookupCache
 
 
-AVAILABLE_SIZES = ['XS', 'S', 'M', 'L', 'XL']
+AVAILABLE_SIZES = [code for code, _ in SIZES]
+RELATED_PRODUCTS_LIMIT = 4
+RELATED_PRODUCTS_CACHE_TIMEOUT = 60 * 15
+
+FILTER_FIELDS = ['brand', 'material', 'shape', 'color']
 
 
 def product_list(request: HttpRequest) -> HttpResponse:
     products = Product.objects.select_related('category').prefetch_related('images').all()
-    categories = Category.objects.all()
+    navigation = CategoryService.get_navigation()
 
     selected_category = None
+    category_trail = []
+    subcategories = ()
     category_slug = request.GET.get('category')
     if category_slug:
-        selected_category = get_object_or_404(Category, slug=category_slug)
-        products = products.filter(category=selected_category)
-
-    brands = request.GET.getlist('brand')
-    if brands:
-        products = products.filter(brand__in=brands)
-
-    materials = request.GET.getlist('material')
-    if materials:
-        products = products.filter(material__in=materials)
-
-    shapes = request.GET.getlist('shape')
-    if shapes:
-        products = products.filter(shape__in=shapes)
-
-    colors = request.GET.getlist('color')
-    if colors:
-        products = products.filter(color__in=colors)
+        selected_category = navigation.get(category_slug)
+        if selected_category is None:
+            selected_category = get_object_or_404(Category, slug=category_slug)
+            category_trail = [selected_category]
+        else:
+            category_trail = navigation.get_trail(selected_category)
+            subcategories = selected_category.children
+            if not subcategories and len(category_trail) > 1:
+                subcategories = category_trail[-2].children
+        products = products.in_category(selected_category)
+
+    selected_filters = {}
+    for field in FILTER_FIELDS:
+        values = request.GET.getlist(field)
+        if values:
+            products = products.filter(**{f'{field}__in': values})
+            selected_filters[field] = values
 
     price_min = request.GET.get('price_min')
     if price_min:
@@ -57,65 +67,93 @@ def product_list(request: HttpRequest) -> HttpResponse:
     elif sort_option == 'newest':
         products = products.order_by('-created_at')
 
-    all_products = Product.objects.all()
-    if selected_category:
-        all_products = all_products.filter(category=selected_category)
-
-    filter_options = {
-        'brands': sorted([b for b in all_products.values_list('brand', flat=True).distinct() if b]),
-        'materials': sorted([m for m in all_products.values_list('material', flat=True).distinct() if m]),
-        'shapes': sorted([s for s in all_products.values_list('shape', flat=True).distinct() if s]),
-        'colors': sorted([c for c in all_products.values_list('color', flat=True).distinct() if c]),
-    }
-
     paginator = Paginator(products, 12)
     page_number = request.GET.get('page', 1)
     page_obj = paginator.get_page(page_number)
 
     for product in page_obj:
-        product.main_image = product.images.filter(is_main=True).first() or product.images.first()
-
-    cart_service = CartService(request)
+        product.main_image = get_main_image(product)
 
     context = {
         'products': page_obj,
-        'categories': categories,
         'selected_category': selected_category,
-        'filter_options': filter_options,
-        'cart_count': cart_service.get_cart_count(),
+        'selected_filters': selected_filters,
+        'filter_chips': build_filter_chips(request),
     }
 
+    # Filter and pagination requests only swap the grid; the result count and
+    # filter chips ride along as out-of-band fragments, so the facet query and
+    # the rest of the page are skipped.
+    if is_htmx(request) and request.headers.get('HX-Target', '') == 'product-grid':
+        return render(request, 'catalog/partials/product_grid_response.html', context)
+
+    all_products = Product.objects.all()
+    if selected_category:
+        all_products = all_products.in_category(selected_category)
+
+    context.update({
+        'categories': navigation.roots,
+        'subcategories': subcategories,
+        'active_category_ids': [category.id for category in category_trail],
+        'filter_options': build_filter_options(all_products),
+    })
+
     if is_htmx(request):
-        hx_target = request.headers.get('HX-Target', '')
-        if hx_target == 'product-grid':
-            return render(request, 'catalog/partials/product_grid.html', context)
         return render(request, 'catalog/partials/product_list_content.html', context)
 
     return render(request, 'catalog/product_list.html', context)
 
 
-def product_detail(request: HttpRequest, slug: str) -> HttpResponse:
-    product = get_object_or_404(
-        Product.objects.select_related('category').prefetch_related('images'),
-        slug=slug
+def build_filter_options(products: QuerySet) -> dict:
+    counts = {field: Counter() for field in FILTER_FIELDS}
+    rows = (
+        products
+        .order_by()
+        .values(*FILTER_FIELDS)
+        .annotate(product_count=Count('id'))
     )
+    for row in rows:
+        for field in FILTER_FIELDS:
+            if row[field]:
+                counts[field][row[field]] += row['product_count']
+
+    return {
+        f'{field}s': [
+            {'value': value, 'count': count}
+            for value, count in sorted(counts[field].items())
+        ]
+        for field in FILTER_FIELDS
+    }
+
 
-    related_products = Product.objects.filter(
-        category=product.category
-    ).exclude(
-        id=product.id
-    ).select_related('category').prefetch_related('images')[:4]
+def build_filter_chips(request: HttpRequest) -> list[dict]:
+    chips = []
+    for param in [*FILTER_FIELDS, 'price_min', 'price_max']:
+        for value in request.GET.getlist(param):
+            if not value:
+                continue
+            query = request.GET.copy()
+            query.setlist(param, [v for v in query.getlist(param) if v != value])
+            query.pop('page', None)
+            label = value
+            if param == 'price_min':
+                label = f'From ${value}'
+            elif param == 'price_max':
+                label = f'Up to ${value}'
+            chips.append({'label': label, 'query': query.urlencode()})
+    return chips
 
-    for related_product in related_products:
-        related_product.main_image = related_product.images.filter(is_main=True).first() or related_product.images.first()
 
-    cart_service = CartService(request)
+def product_detail(request: HttpRequest, slug: str) -> HttpResponse:
+    product = NegativeLookupCache.get_object_or_404(
+        Product.objects.select_related('category').prefetch_related('images'),
+        NegativeLookupCache.PRODUCTS,
+        slug=slug
+    )
 
     context = {
         'product': product,
         'available_sizes': AVAILABLE_SIZES,
-        'related_products': related_products,
-        'cart_count': cart_service.get_cart_count(),
     }
 
     if is_htmx(request):
@@ -124,6 +162,32 @@ def product_detail(request: HttpRequest, slug: str) -> HttpResponse:
     return render(request, 'catalog/product_detail.html', context)
 
 
+@cache_page(RELATED_PRODUCTS_CACHE_TIMEOUT)
+def related_products(request: HttpRequest, slug: str) -> HttpResponse:
+    product = NegativeLookupCache.get_object_or_404(
+        Product.objects.only('id', 'category_id'),
+        NegativeLookupCache.PRODUCTS,
+        slug=slug
+    )
+
+    related = list(
+        Product.objects.filter(
+            category_id=product.category_id
+        ).exclude(
+            id=product.id
+        ).prefetch_related('images')[:RELATED_PRODUCTS_LIMIT]
+    )
+
+    for related_product in related:
+        related_product.main_image = get_main_image(related_product)
+
+    # Rendered without the request so no context processor touches the
+    # session and the fragment stays cacheable across visitors.
+    return HttpResponse(render_to_string('catalog/partials/related_products.html', {
+        'related_products': related,
+    }))
+
+
 def search_products(request: HttpRequest) -> HttpResponse:
     query = request.GET.get('q', '').strip()
 
@@ -139,7 +203,7 @@ def search_products(request: HttpRequest) -> HttpResponse:
         products = products.distinct()[:12]
 
         for product in products:
-            product.main_image = product.images.filter(is_main=True).first() or product.images.first()
+            product.main_image = get_main_image(product)
 
     context = {
         'products': products,
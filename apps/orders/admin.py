@@ -1,7 +1,40 @@
-from django.contrib import admin
+from collections import Counter
+from datetime import timedelta
+
+from django.contrib import admin, messages
+from django.core.exceptions import ObjectDoesNotExist, ValidationError
+from django.http import StreamingHttpResponse
+from django.shortcuts import redirect
+from django.template.response import TemplateResponse
+from django.urls import path
+from django.utils import timezone
 from django.utils.html import format_html
-from .models import Order, OrderItem
-from apps.payments.models import Payment
+from .models import (
+    ArchivedOrder, ArchivedOrderItem, DailyProductSalesRollup, DailySalesRollup, IdempotencyKey,
+    Order, OrderItem, StockReservation
+)
+from services.order_dtos import OrderTransitionDTO
+from services.order_export_service import OrderExportService
+from services.order_service import OrderService
+from services.paginator import EstimatedCountPaginator
+from services.sales_rollup_service import SalesRollupService
+
+
+class ArchiveFallbackMixin:
+    archive_model = None
+
+    def _get_obj_does_not_exist_redirect(self, request, opts, object_id):
+        # Archived rows keep their primary keys, so links to an object that
+        # has since been archived open its read-only archive page instead.
+        if self.archive_model is not None:
+            try:
+                archived = self.archive_model.objects.filter(pk=object_id).exists()
+            except (ValueError, ValidationError):
+                archived = False
+            if archived:
+                archive_opts = self.archive_model._meta
+                return redirect(f'admin:{archive_opts.app_label}_{archive_opts.model_name}_change', object_id)
+        return super()._get_obj_does_not_exist_redirect(request, opts, object_id)
 
 
 class OrderItemInline(admin.TabularInline):
@@ -11,8 +44,68 @@ class OrderItemInline(admin.TabularInline):
     readonly_fields = ['line_total']
 
 
+def orders_csv_response(orders) -> StreamingHttpResponse:
+    response = StreamingHttpResponse(OrderExportService.iter_csv([orders]), content_type='text/csv')
+    response['Content-Disposition'] = f'attachment; filename="orders-{timezone.now():%Y%m%d-%H%M%S}.csv"'
+    return response
+
+
+def export_orders_csv(modeladmin, request, queryset):
+    return orders_csv_response(queryset)
+export_orders_csv.short_description = 'Export selected orders as CSV'
+
+
+def export_related_orders_csv(modeladmin, request, queryset):
+    order_model = queryset.model._meta.get_field('order').related_model
+    return orders_csv_response(
+        order_model.objects.filter(pk__in=queryset.values('order_id')).order_by('-created_at')
+    )
+export_related_orders_csv.short_description = 'Export orders of selected rows as CSV'
+
+
+def transition_action(status: str):
+    def action(modeladmin, request, queryset):
+        order_ids = list(queryset.values_list('order_id', flat=True))
+        outcomes = OrderService.bulk_transition(order_ids, status)
+        counts = Counter(outcome.outcome for outcome in outcomes)
+
+        modeladmin.message_user(
+            request,
+            f'{counts[OrderTransitionDTO.UPDATED]} orders marked as {label}, '
+            f'{counts[OrderTransitionDTO.UNCHANGED]} already {label}.',
+            messages.SUCCESS,
+        )
+        skipped = [outcome for outcome in outcomes if outcome.outcome == OrderTransitionDTO.NOT_ALLOWED]
+        if skipped:
+            modeladmin.message_user(
+                request,
+                f'{len(skipped)} orders cannot be marked as {label}: '
+                + ', '.join(f'{outcome.order_id} ({outcome.old_status})' for outcome in skipped[:20]),
+                messages.WARNING,
+            )
+
+    label = dict(Order.STATUS_CHOICES)[status].lower()
+    action.__name__ = f'mark_{status}'
+    action.short_description = f'Mark selected orders as {label}'
+    return action
+
+
 @admin.register(Order)
-class OrderAdmin(admin.ModelAdmin):
+class OrderAdmin(ArchiveFallbackMixin, admin.ModelAdmin):
+    archive_model = ArchivedOrder
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    show_facets = admin.ShowFacets.NEVER
+    actions = [export_orders_csv] + [
+        transition_action(status)
+        for status in [
+            Order.STATUS_PROCESSING,
+            Order.STATUS_SHIPPED,
+            Order.STATUS_DELIVERED,
+            Order.STATUS_CANCELLED,
+            Order.STATUS_REFUNDED,
+        ]
+    ]
     list_display = [
         'order_id',
         'customer_full_name',
@@ -23,8 +116,11 @@ class OrderAdmin(admin.ModelAdmin):
     ]
     list_filter = ['status', 'shipping_method', 'created_at']
     search_fields = ['order_id', 'customer_email', 'customer_first_name', 'customer_last_name']
+    # Status changes go through the transition actions, which validate them
+    # and keep the sales rollups in step.
     readonly_fields = [
         'order_id',
+        'status',
         'created_at',
         'updated_at',
         'customer_full_name',
@@ -91,7 +187,7 @@ class OrderAdmin(admin.ModelAdmin):
         from django.urls import reverse
         try:
             payment = obj.payment
-            url = reverse('admin:payments_payment_change', args=[payment.id])
+            url = reverse(f'admin:payments_{payment._meta.model_name}_change', args=[payment.id])
 
             status_colors = {
                 'waiting': '#6c757d',
@@ -123,20 +219,138 @@ class OrderAdmin(admin.ModelAdmin):
                 payment.price_currency.upper(),
                 payment.pay_currency.upper() if payment.pay_currency else 'N/A'
             )
-        except Payment.DoesNotExist:
+        except ObjectDoesNotExist:
             return format_html('<em style="color: #999;">No payment associated</em>')
     payment_info.short_description = 'Payment Information'
 
     def get_queryset(self, request):
-        return super().get_queryset(request).select_related('payment').prefetch_related('items')
+        # Items are loaded by the inline on the change page only.
+        return super().get_queryset(request).select_related('payment').defer('payment__webhook_data')
+
+    def get_search_results(self, request, queryset, search_term):
+        # A full email is looked up exactly so it can use the history index
+        # instead of a contains scan over every searchable column. Emails are
+        # stored lowercased; rows edited by hand still fall back to the
+        # regular case-insensitive search.
+        term = search_term.strip()
+        if '@' in term and ' ' not in term:
+            matches = queryset.filter(customer_email=term.lower())
+            if matches.exists():
+                return matches, False
+        return super().get_search_results(request, queryset, search_term)
+
+
+class ArchivedOrderItemInline(admin.TabularInline):
+    model = ArchivedOrderItem
+    extra = 0
+    fields = ['product_name', 'product_slug', 'product_price', 'size', 'quantity', 'line_total']
+    readonly_fields = fields
+    can_delete = False
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(ArchivedOrder)
+class ArchivedOrderAdmin(OrderAdmin):
+    archive_model = None
+    actions = [export_orders_csv]
+    list_display = [*OrderAdmin.list_display, 'archived_at']
+    inlines = [ArchivedOrderItemInline]
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
 
 
 @admin.register(OrderItem)
 class OrderItemAdmin(admin.ModelAdmin):
     list_display = ['id', 'order', 'product_name', 'size', 'quantity', 'line_total']
+    actions = [export_related_orders_csv]
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    show_facets = admin.ShowFacets.NEVER
     list_filter = ['size', 'created_at']
     search_fields = ['product_name', 'order__order_id']
     readonly_fields = ['created_at']
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('order').defer('product_snapshot')
+
+
+@admin.register(IdempotencyKey)
+class IdempotencyKeyAdmin(admin.ModelAdmin):
+    list_display = ['key', 'order', 'created_at']
+    search_fields = ['key', 'order__order_id']
+    readonly_fields = ['key', 'order', 'response', 'created_at']
+    raw_id_fields = ['order']
+
     def get_queryset(self, request):
         return super().get_queryset(request).select_related('order')
+
+
+@admin.register(StockReservation)
+class StockReservationAdmin(admin.ModelAdmin):
+    list_display = ['id', 'order', 'product', 'size', 'quantity', 'status', 'expires_at']
+    list_filter = ['status', 'expires_at']
+    search_fields = ['order__order_id', 'product__name']
+    raw_id_fields = ['order', 'product']
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('order', 'product')
+
+
+@admin.register(DailySalesRollup)
+class DailySalesRollupAdmin(admin.ModelAdmin):
+    list_display = ['date', 'status', 'shipping_method', 'orders', 'units', 'revenue']
+    list_filter = ['status', 'shipping_method']
+    date_hierarchy = 'date'
+    readonly_fields = ['date', 'status', 'shipping_method', 'orders', 'units', 'revenue', 'updated_at']
+
+    def has_add_permission(self, request):
+        return False
+
+    def get_urls(self):
+        return [
+            path(
+                'dashboard/',
+                self.admin_site.admin_view(self.dashboard_view),
+                name='orders_dailysalesrollup_dashboard',
+            ),
+        ] + super().get_urls()
+
+    def dashboard_view(self, request):
+        try:
+            days = max(1, min(int(request.GET.get('days', 30)), 366))
+        except ValueError:
+            days = 30
+
+        end = timezone.localdate()
+        context = {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'title': 'Sales dashboard',
+            'days': days,
+            'day_choices': [7, 30, 90, 365],
+            'dashboard': SalesRollupService.get_dashboard(end - timedelta(days=days - 1), end),
+        }
+        return TemplateResponse(request, 'admin/orders/sales_dashboard.html', context)
+
+
+@admin.register(DailyProductSalesRollup)
+class DailyProductSalesRollupAdmin(admin.ModelAdmin):
+    list_display = ['date', 'product_name', 'brand', 'orders', 'units', 'revenue']
+    list_filter = ['brand']
+    search_fields = ['product_name', 'product_slug', 'brand']
+    date_hierarchy = 'date'
+    readonly_fields = [
+        'date', 'product_slug', 'product_name', 'brand', 'orders', 'units', 'revenue', 'updated_at'
+    ]
+
+    def has_add_permission(self, request):
+        return False
@@ -0,0 +1,54 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from services.archive_service import ARCHIVABLE_STATUSES, OrderArchiveService
+
+
+class Command(BaseCommand):
+    help = 'Moves old delivered and cancelled orders, with their items and payments, to the archive tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--months',
+            type=int,
+            default=12,
+            help='Archive orders placed more than this many months ago (default: 12)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Orders moved per transaction (default: 500)',
+        )
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=0.1,
+            help='Seconds to pause between batches (default: 0.1)',
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        cutoff = timezone.now() - timedelta(days=30 * options['months'])
+        archived = 0
+
+        self.stdout.write(
+            f'Archiving {", ".join(ARCHIVABLE_STATUSES)} orders placed before {cutoff:%Y-%m-%d}'
+        )
+
+        while True:
+            count = OrderArchiveService.archive_batch(cutoff, options['batch_size'])
+            if not count:
+                break
+            archived += count
+            self.stdout.write(f'  ...{archived} orders archived')
+            time.sleep(options['sleep'])
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Archived {archived} orders in {time.monotonic() - started:.2f}s'
+            )
+        )
@@ -1,9 +1,9 @@
 import random
 from decimal import Decimal
 from django.core.management.base import BaseCommand
-from django.utils.crypto import get_random_string
 from apps.catalog.models import Product
 from apps.orders.models import Order, OrderItem
+from services.order_service import OrderService
 
 
 class Command(BaseCommand):
@@ -63,7 +63,7 @@ class Command(BaseCommand):
             shipping_method = random.choice(shipping_methods)
 
             order = Order.objects.create(
-                order_id=f'ORD-{get_random_string(8).upper()}',
+                order_id=OrderService.generate_order_id(),
                 status=random.choice(statuses),
                 customer_email=f'{first_name.lower()}.{last_name.lower()}@example.com',
                 customer_first_name=first_name,
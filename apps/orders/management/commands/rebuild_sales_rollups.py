@@ -0,0 +1,58 @@
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from services.sales_rollup_service import SalesRollupService
+
+
+class Command(BaseCommand):
+    help = 'Recomputes daily sales rollups from orders, one day per transaction'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--start',
+            type=date.fromisoformat,
+            help='First day to rebuild, YYYY-MM-DD (default: --days before --end)',
+        )
+        parser.add_argument(
+            '--end',
+            type=date.fromisoformat,
+            help='Last day to rebuild, YYYY-MM-DD (default: today)',
+        )
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=30,
+            help='Number of days to rebuild when --start is not given (default: 30)',
+        )
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=0.1,
+            help='Seconds to pause between days (default: 0.1)',
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        end = options['end'] or timezone.localdate()
+        start = options['start'] or end - timedelta(days=options['days'] - 1)
+        if start > end:
+            raise CommandError('--start must not be after --end')
+
+        day = start
+        orders = 0
+        while day <= end:
+            count = SalesRollupService.rebuild_day(day)
+            orders += count
+            self.stdout.write(f'  {day}: {count} orders')
+            day += timedelta(days=1)
+            time.sleep(options['sleep'])
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Rebuilt rollups for {orders} orders from {start} to {end} '
+                f'in {time.monotonic() - started:.2f}s'
+            )
+        )
@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from services.stock_service import StockService
+
+
+class Command(BaseCommand):
+    help = 'Returns stock held by reservations whose payment window has expired'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Reservations released per transaction (default: 500)',
+        )
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=0.1,
+            help='Seconds to pause between batches (default: 0.1)',
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        released = 0
+
+        while True:
+            count = StockService.release_expired(options['batch_size'])
+            if not count:
+                break
+            released += count
+            time.sleep(options['sleep'])
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Released {released} expired reservations in {time.monotonic() - started:.2f}s'
+            )
+        )
@@ -0,0 +1,21 @@
+# Generated by Django 6.0 on 2026-10-19 10:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0003_stockreservation'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='order',
+            name='orders_orde_custome_ca0107_idx',
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['customer_email', '-created_at', '-id'], include=('order_id', 'status', 'total'), name='orders_order_history_idx'),
+        ),
+    ]
@@ -0,0 +1,66 @@
+# Generated by Django 6.0 on 2026-10-19 11:05
+
+import django.core.validators
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0005_sales_rollups'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedOrder',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('order_id', models.CharField(db_index=True, max_length=100, unique=True)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('awaiting_payment', 'Awaiting Payment'), ('paid', 'Paid'), ('shipped', 'Shipped'), ('delivered', 'Delivered'), ('cancelled', 'Cancelled'), ('refunded', 'Refunded')], db_index=True, default='pending', max_length=20)),
+                ('customer_email', models.EmailField(max_length=254, validators=[django.core.validators.EmailValidator()])),
+                ('customer_first_name', models.CharField(max_length=100)),
+                ('customer_last_name', models.CharField(max_length=100)),
+                ('customer_phone', models.CharField(max_length=20)),
+                ('shipping_address_line1', models.CharField(max_length=255)),
+                ('shipping_address_line2', models.CharField(blank=True, max_length=255)),
+                ('shipping_city', models.CharField(max_length=100)),
+                ('shipping_state', models.CharField(blank=True, max_length=100)),
+                ('shipping_postal_code', models.CharField(max_length=20)),
+                ('shipping_country', models.CharField(max_length=100)),
+                ('shipping_method', models.CharField(choices=[('standard', 'Standard Shipping'), ('express', 'Express Shipping'), ('overnight', 'Overnight Shipping')], default='standard', max_length=20)),
+                ('shipping_cost', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=10)),
+                ('subtotal', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('total', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('notes', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'abstract': False,
+                'indexes': [models.Index(fields=['customer_email', '-created_at'], name='orders_arch_custome_862c4d_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedOrderItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('product_name', models.CharField(max_length=200)),
+                ('product_slug', models.SlugField()),
+                ('product_price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('size', models.CharField(max_length=5)),
+                ('quantity', models.PositiveIntegerField(default=1)),
+                ('line_total', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('product_snapshot', models.JSONField(blank=True, default=dict)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='items', to='orders.archivedorder')),
+            ],
+            options={
+                'ordering': ['id'],
+                'abstract': False,
+            },
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 6.0 on 2026-10-19 13:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0006_order_archive'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='archivedorder',
+            name='orders_arch_custome_862c4d_idx',
+        ),
+        migrations.AddIndex(
+            model_name='archivedorder',
+            index=models.Index(fields=['customer_email', '-created_at', '-id'], include=('order_id', 'status', 'total'), name='orders_archived_history_idx'),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 6.0 on 2026-10-19 14:05
+
+from django.db import migrations
+from django.db.models.functions import Lower
+
+
+def lowercase_customer_emails(apps, schema_editor):
+    for model_name in ('Order', 'ArchivedOrder'):
+        apps.get_model('orders', model_name).objects.update(customer_email=Lower('customer_email'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0007_archived_order_history_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(lowercase_customer_emails, migrations.RunPython.noop),
+    ]
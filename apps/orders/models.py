@@ -2,8 +2,10 @@ from decimal import Decimal
 from django.db import models
 from django.core.validators import EmailValidator
 
+from apps.catalog.models import SIZES
 
-class Order(models.Model):
+
+class AbstractOrder(models.Model):
     STATUS_PENDING = 'pending'
     STATUS_PROCESSING = 'processing'
     STATUS_AWAITING_PAYMENT = 'awaiting_payment'
@@ -24,6 +26,17 @@ class Order(models.Model):
         (STATUS_REFUNDED, 'Refunded'),
     ]
 
+    TRANSITIONS = {
+        STATUS_PENDING: [STATUS_PROCESSING, STATUS_AWAITING_PAYMENT, STATUS_PAID, STATUS_CANCELLED],
+        STATUS_PROCESSING: [STATUS_AWAITING_PAYMENT, STATUS_PAID, STATUS_CANCELLED],
+        STATUS_AWAITING_PAYMENT: [STATUS_PAID, STATUS_CANCELLED],
+        STATUS_PAID: [STATUS_SHIPPED, STATUS_CANCELLED, STATUS_REFUNDED],
+        STATUS_SHIPPED: [STATUS_DELIVERED, STATUS_REFUNDED],
+        STATUS_DELIVERED: [STATUS_REFUNDED],
+        STATUS_CANCELLED: [],
+        STATUS_REFUNDED: [],
+    }
+
     SHIPPING_STANDARD = 'standard'
     SHIPPING_EXPRESS = 'express'
     SHIPPING_OVERNIGHT = 'overnight'
@@ -61,17 +74,20 @@ class Order(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
+        abstract = True
         ordering = ['-created_at']
-        indexes = [
-            models.Index(fields=['order_id']),
-            models.Index(fields=['status']),
-            models.Index(fields=['customer_email']),
-            models.Index(fields=['-created_at']),
-        ]
 
     def __str__(self) -> str:
         return f"Order {self.order_id} - {self.get_status_display()}"
 
+    @classmethod
+    def can_transition(cls, old_status: str, new_status: str) -> bool:
+        return new_status in cls.TRANSITIONS.get(old_status, [])
+
+    @classmethod
+    def allowed_from(cls, new_status: str) -> list[str]:
+        return [status for status, targets in cls.TRANSITIONS.items() if new_status in targets]
+
     @property
     def customer_full_name(self) -> str:
         return f"{self.customer_first_name} {self.customer_last_name}"
@@ -89,8 +105,23 @@ class Order(models.Model):
         return ', '.join(filter(None, parts))
 
 
-class OrderItem(models.Model):
-    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='items')
+class Order(AbstractOrder):
+    class Meta(AbstractOrder.Meta):
+        indexes = [
+            models.Index(fields=['order_id']),
+            models.Index(fields=['status']),
+            models.Index(fields=['-created_at']),
+            # Order history pages walk this index in key order and read the
+            # summary columns from it without visiting the table.
+            models.Index(
+                fields=['customer_email', '-created_at', '-id'],
+                include=['order_id', 'status', 'total'],
+                name='orders_order_history_idx',
+            ),
+        ]
+
+
+class AbstractOrderItem(models.Model):
     product_name = models.CharField(max_length=200)
     product_slug = models.SlugField()
     product_price = models.DecimalField(max_digits=10, decimal_places=2)
@@ -105,10 +136,8 @@ class OrderItem(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
+        abstract = True
         ordering = ['id']
-        indexes = [
-            models.Index(fields=['order', 'product_slug']),
-        ]
 
     def __str__(self) -> str:
         return f"{self.quantity}x {self.product_name} ({self.size}) - Order {self.order.order_id}"
@@ -117,3 +146,122 @@ class OrderItem(models.Model):
         if not self.line_total:
             self.line_total = self.product_price * self.quantity
         super().save(*args, **kwargs)
+
+
+class OrderItem(AbstractOrderItem):
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='items')
+
+    class Meta(AbstractOrderItem.Meta):
+        indexes = [
+            models.Index(fields=['order', 'product_slug']),
+        ]
+
+
+# Delivered and cancelled orders are moved here once they are old enough, with
+# the same columns and primary keys, so the live tables and their indexes only
+# hold orders that can still change.
+class ArchivedOrder(AbstractOrder):
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta(AbstractOrder.Meta):
+        indexes = [
+            models.Index(
+                fields=['customer_email', '-created_at', '-id'],
+                include=['order_id', 'status', 'total'],
+                name='orders_archived_history_idx',
+            ),
+        ]
+
+
+class ArchivedOrderItem(AbstractOrderItem):
+    order = models.ForeignKey(ArchivedOrder, on_delete=models.CASCADE, related_name='items')
+
+
+class IdempotencyKey(models.Model):
+    key = models.CharField(max_length=64, unique=True)
+    order = models.ForeignKey(
+        Order,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='idempotency_keys'
+    )
+    response = models.JSONField(default=dict, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self) -> str:
+        return self.key
+
+
+class StockReservation(models.Model):
+    STATUS_RESERVED = 'reserved'
+    STATUS_CONSUMED = 'consumed'
+    STATUS_RELEASED = 'released'
+
+    STATUS_CHOICES = [
+        (STATUS_RESERVED, 'Reserved'),
+        (STATUS_CONSUMED, 'Consumed'),
+        (STATUS_RELEASED, 'Released'),
+    ]
+
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='stock_reservations')
+    product = models.ForeignKey(
+        'catalog.Product',
+        on_delete=models.CASCADE,
+        related_name='stock_reservations'
+    )
+    size = models.CharField(max_length=5, choices=SIZES)
+    quantity = models.PositiveIntegerField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_RESERVED)
+    expires_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'expires_at']),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.quantity}x product #{self.product_id} ({self.size})"
+
+
+class DailySalesRollup(models.Model):
+    date = models.DateField()
+    status = models.CharField(max_length=20, choices=Order.STATUS_CHOICES)
+    shipping_method = models.CharField(max_length=20, choices=Order.SHIPPING_CHOICES)
+    orders = models.IntegerField(default=0)
+    units = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-date', 'status', 'shipping_method']
+        unique_together = ['date', 'status', 'shipping_method']
+
+    def __str__(self) -> str:
+        return f"{self.date} {self.status}/{self.shipping_method}: {self.orders} orders"
+
+
+class DailyProductSalesRollup(models.Model):
+    date = models.DateField()
+    product_slug = models.SlugField()
+    product_name = models.CharField(max_length=200)
+    brand = models.CharField(max_length=100, blank=True)
+    orders = models.IntegerField(default=0)
+    units = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-date', '-revenue']
+        unique_together = ['date', 'product_slug']
+        indexes = [
+            models.Index(fields=['date', 'brand']),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.date} {self.product_name}: {self.units} units"
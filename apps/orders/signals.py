@@ -0,0 +1,29 @@
+from django.db.models.signals import post_save
+from django.dispatch import Signal, receiver
+
+from .models import Order
+from services.lookup_cache import NegativeLookupCache
+from services.sales_rollup_service import SalesRollupService
+from services.stock_service import StockService
+
+
+# Sent once per transition with the moved orders, a mapping of their pk to the
+# status they left and the status they all moved to.
+order_status_changed = Signal()
+
+
+@receiver(post_save, sender=Order)
+def forget_missing_order(sender, instance: Order, created: bool, **kwargs) -> None:
+    if created:
+        NegativeLookupCache.forget(NegativeLookupCache.ORDERS, instance.order_id)
+
+
+@receiver(order_status_changed, sender=Order)
+def update_sales_rollups(sender, orders: list[Order], old_statuses: dict, new_status: str, **kwargs) -> None:
+    SalesRollupService.apply_status_changes(orders, old_statuses, new_status)
+
+
+@receiver(order_status_changed, sender=Order)
+def release_stock_reservations(sender, orders: list[Order], new_status: str, **kwargs) -> None:
+    if new_status in (Order.STATUS_CANCELLED, Order.STATUS_REFUNDED):
+        StockService.release_orders(orders)
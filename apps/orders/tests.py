@@ -1,3 +1,49 @@
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
 
-# Create your tests here.
+from apps.cart.models import CartItem
+from apps.catalog.models import Category, Product
+from apps.orders.models import Order
+from apps.orders.views import CHECKOUT_QUERY_BUDGET
+
+
+class CheckoutQueryBudgetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name='Sunglasses', slug='sunglasses')
+        cls.products = [
+            Product.objects.create(category=category, name=f'Frame {i}', slug=f'frame-{i}', price=100 + i)
+            for i in range(10)
+        ]
+
+    def _checkout(self, products) -> int:
+        for product in products:
+            self.client.post(reverse('cart:add', args=[product.id]), {'size': 'M', 'quantity': 2})
+
+        with CaptureQueriesContext(connection) as queries, self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('orders:create'), {
+                'idempotency_key': f'checkout-{len(products)}',
+                'email': 'customer@example.com',
+                'first_name': 'Ada',
+                'last_name': 'Lovelace',
+                'phone': '+10000000000',
+                'address_line1': '1 Main Street',
+                'city': 'London',
+                'postal_code': 'N1',
+                'country': 'GB',
+            })
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Order.objects.get(order_id=response.json()['order_id']).items.count(), len(products))
+        self.assertFalse(CartItem.objects.exists())
+        return len(queries)
+
+    def test_checkout_stays_within_budget(self):
+        self.assertLessEqual(self._checkout(self.products[:1]), CHECKOUT_QUERY_BUDGET)
+
+    def test_checkout_queries_do_not_grow_with_lines(self):
+        one_line = self._checkout(self.products[:1])
+        self.client.cookies.clear()
+        self.assertEqual(self._checkout(self.products), one_line)
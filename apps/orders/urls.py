@@ -6,6 +6,7 @@ app_name = 'orders'
 urlpatterns = [
     path('checkout/', views.checkout_view, name='checkout'),
     path('create/', views.create_order_view, name='create'),
+    path('history/', views.order_history_view, name='history'),
     path('<str:order_id>/', views.order_detail_view, name='detail'),
     path('<str:order_id>/awaiting/', views.awaiting_payment_view, name='awaiting_payment'),
 ]
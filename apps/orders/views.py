@@ -1,15 +1,31 @@
+import uuid
+from datetime import timedelta
 from decimal import Decimal
-from django.shortcuts import render, redirect, get_object_or_404
+from typing import Optional
+from django.db import IntegrityError, transaction
+from django.db.models import Subquery
+from django.shortcuts import render, redirect
 from django.http import JsonResponse, HttpRequest, HttpResponse
 from django.views.decorators.http import require_http_methods, require_POST
 from django.views.decorators.csrf import csrf_exempt
 from django.urls import reverse
+from django.utils import timezone
 
-from apps.cart.models import Cart
 from apps.cart.services import CartService
-from apps.orders.models import Order
+from apps.orders.models import ArchivedOrder, IdempotencyKey, Order
 from apps.catalog.utils import is_htmx
-from services.order_service import OrderService
+from services.lookup_cache import NegativeLookupCache
+from services.order_service import ORDER_HISTORY_PAGE_SIZE, OrderService
+from services.query_budget import query_budget
+from services.stock_service import OutOfStockError
+
+
+# Session, idempotency key, cart lines, products, order, order items, stock
+# reservation, cart delete and the savepoints around them, plus room for a
+# buffered quantity flush; none of these grow with the number of lines.
+CHECKOUT_QUERY_BUDGET = 24
+
+IDEMPOTENCY_KEY_WINDOW = timedelta(hours=24)
 
 
 @require_http_methods(['GET'])
@@ -24,6 +40,7 @@ def checkout_view(request: HttpRequest) -> HttpResponse:
 
     context = {
         'cart': cart_dto,
+        'idempotency_key': uuid.uuid4().hex,
         'shipping_methods': [
             {'value': 'standard', 'label': 'Standard Shipping', 'cost': Decimal('10.00')},
             {'value': 'express', 'label': 'Express Shipping', 'cost': Decimal('25.00')},
@@ -38,17 +55,21 @@ def checkout_view(request: HttpRequest) -> HttpResponse:
 
 
 @require_POST
+@query_budget(CHECKOUT_QUERY_BUDGET, 'create_order_view')
 def create_order_view(request: HttpRequest) -> HttpResponse:
-    cart_service = CartService(request)
-    cart = cart_service.get_cart()
+    idempotency_key = request.POST.get('idempotency_key', '')
+    if not idempotency_key or len(idempotency_key) > 64:
+        return JsonResponse({'error': 'Missing idempotency key'}, status=400)
 
-    if not cart:
-        return JsonResponse({'error': 'Cart not found'}, status=404)
+    stored_response = _get_idempotent_response(idempotency_key)
+    if stored_response is not None:
+        return stored_response
 
-    if not cart.items.exists():
-        return JsonResponse({'error': 'Cart is empty'}, status=400)
+    cart_service = CartService(request)
+    lines = cart_service.get_lines()
 
-    cart = Cart.objects.prefetch_related('items__product').get(id=cart.id)
+    if not lines:
+        return JsonResponse({'error': 'Cart is empty'}, status=400)
 
     customer_info = {
         'email': request.POST.get('email'),
@@ -78,30 +99,109 @@ def create_order_view(request: HttpRequest) -> HttpResponse:
     notes = request.POST.get('notes', '')
 
     try:
-        order_created = OrderService.create_order_from_cart(
-            cart=cart,
-            customer_info=customer_info,
-            shipping_address=shipping_address,
-            shipping_method=shipping_method,
-            shipping_cost=shipping_cost,
-            notes=notes,
+        # A key-value cart storage is not part of the transaction, so the cart
+        # is only cleared once the order has committed; a rolled back checkout
+        # leaves it intact. The key is inserted first so a concurrent duplicate
+        # blocks on its unique index and fails there instead of building a
+        # second order.
+        with transaction.atomic():
+            key = IdempotencyKey.objects.create(key=idempotency_key)
+
+            order_created = OrderService.create_order_from_lines(
+                lines=lines,
+                customer_info=customer_info,
+                shipping_address=shipping_address,
+                shipping_method=shipping_method,
+                shipping_cost=shipping_cost,
+                notes=notes,
+            )
+            transaction.on_commit(cart_service.clear_cart)
+
+            response_data = {
+                'success': True,
+                'order_id': order_created.order_id,
+                'redirect_url': reverse('payments:create_invoice', kwargs={'order_id': order_created.order_id}),
+            }
+            IdempotencyKey.objects.filter(pk=key.pk).update(
+                order=Subquery(Order.objects.filter(order_id=order_created.order_id).values('pk')[:1]),
+                response=response_data,
+            )
+
+        return JsonResponse(response_data)
+
+    except OutOfStockError as e:
+        return JsonResponse({'error': str(e)}, status=409)
+
+    except IntegrityError:
+        stored_response = _get_idempotent_response(idempotency_key)
+        if stored_response is not None:
+            return stored_response
+        return JsonResponse({'error': 'Order could not be created, please retry'}, status=409)
+
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=500)
+
+
+def _get_idempotent_response(idempotency_key: str) -> Optional[JsonResponse]:
+    response_data = (
+        IdempotencyKey.objects
+        .filter(
+            key=idempotency_key,
+            created_at__gte=timezone.now() - IDEMPOTENCY_KEY_WINDOW,
         )
+        .exclude(response={})
+        .values_list('response', flat=True)
+        .first()
+    )
+    if response_data is None:
+        return None
+    return JsonResponse(response_data)
 
-        payment_create_url = reverse('payments:create_invoice', kwargs={'order_id': order_created.order_id})
 
-        return JsonResponse({
-            'success': True,
-            'order_id': order_created.order_id,
-            'redirect_url': payment_create_url,
-        })
+@require_http_methods(['GET'])
+def order_history_view(request: HttpRequest) -> HttpResponse:
+    if not request.user.is_authenticated:
+        return JsonResponse({'error': 'Authentication required'}, status=403)
 
-    except Exception as e:
-        return JsonResponse({'error': str(e)}, status=500)
+    # Customers only ever see their own orders; staff may look up any email.
+    customer_email = request.user.email
+    if request.user.is_staff:
+        customer_email = request.GET.get('email', customer_email)
+
+    if not customer_email:
+        return JsonResponse({'orders': [], 'next_cursor': None})
+
+    try:
+        limit = int(request.GET.get('limit', ORDER_HISTORY_PAGE_SIZE))
+        page = OrderService.get_order_history(customer_email, request.GET.get('cursor'), limit)
+    except ValueError:
+        return JsonResponse({'error': 'Invalid page parameters'}, status=400)
+
+    status_labels = dict(Order.STATUS_CHOICES)
+    return JsonResponse({
+        'orders': [
+            {
+                'order_id': summary.order_id,
+                'status': summary.status,
+                'status_display': status_labels.get(summary.status, summary.status),
+                'total': str(summary.total),
+                'created_at': summary.created_at.isoformat(),
+                'url': reverse('orders:detail', kwargs={'order_id': summary.order_id}),
+            }
+            for summary in page.orders
+        ],
+        'next_cursor': page.next_cursor,
+    })
 
 
 @require_http_methods(['GET'])
 def order_detail_view(request: HttpRequest, order_id: str) -> HttpResponse:
-    order = get_object_or_404(OrderService.get_order_by_id, order_id=order_id)
+    order = NegativeLookupCache.get_object_or_404(
+        Order.objects.select_related('payment').prefetch_related('items'),
+        NegativeLookupCache.ORDERS,
+        fallback=ArchivedOrder.objects.select_related('payment').prefetch_related('items'),
+        order_id=order_id
+    )
 
     context = {
         'order': order,
@@ -112,7 +212,11 @@ def order_detail_view(request: HttpRequest, order_id: str) -> HttpResponse:
 
 @require_http_methods(['GET'])
 def awaiting_payment_view(request: HttpRequest, order_id: str) -> HttpResponse:
-    order = get_object_or_404(Order.objects.select_related('payment').prefetch_related('items'), order_id=order_id)
+    order = NegativeLookupCache.get_object_or_404(
+        Order.objects.select_related('payment').prefetch_related('items'),
+        NegativeLookupCache.ORDERS,
+        order_id=order_id
+    )
 
     context = {
         'order': order,
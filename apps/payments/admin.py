@@ -1,10 +1,17 @@
 from django.contrib import admin
 from django.utils.html import format_html
-from .models import Payment
+from apps.orders.admin import ArchiveFallbackMixin, export_related_orders_csv
+from .models import ArchivedPayment, Payment
+from services.paginator import EstimatedCountPaginator
 
 
 @admin.register(Payment)
-class PaymentAdmin(admin.ModelAdmin):
+class PaymentAdmin(ArchiveFallbackMixin, admin.ModelAdmin):
+    archive_model = ArchivedPayment
+    actions = [export_related_orders_csv]
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    show_facets = admin.ShowFacets.NEVER
     list_display = [
         'id',
         'order_link',
@@ -80,7 +87,7 @@ class PaymentAdmin(admin.ModelAdmin):
     def order_link(self, obj):
         from django.urls import reverse
         from django.utils.html import format_html
-        url = reverse('admin:orders_order_change', args=[obj.order.id])
+        url = reverse(f'admin:orders_{obj.order._meta.model_name}_change', args=[obj.order.id])
         return format_html('<a href="{}">{}</a>', url, obj.order.order_id)
     order_link.short_description = 'Order'
 
@@ -91,10 +98,18 @@ class PaymentAdmin(admin.ModelAdmin):
     invoice_url_link.short_description = 'Invoice URL'
 
     def get_queryset(self, request):
-        return super().get_queryset(request).select_related('order')
+        return super().get_queryset(request).select_related('order').defer('webhook_data')
 
     def has_add_permission(self, request):
         return False
 
     def has_delete_permission(self, request, obj=None):
         return False
+
+
+@admin.register(ArchivedPayment)
+class ArchivedPaymentAdmin(PaymentAdmin):
+    archive_model = None
+
+    def has_change_permission(self, request, obj=None):
+        return False
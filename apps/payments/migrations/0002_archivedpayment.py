@@ -0,0 +1,38 @@
+# Generated by Django 6.0 on 2026-10-19 11:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0006_order_archive'),
+        ('payments', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedPayment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nowpayments_invoice_id', models.CharField(db_index=True, max_length=100, unique=True)),
+                ('nowpayments_payment_id', models.CharField(blank=True, db_index=True, max_length=100)),
+                ('status', models.CharField(choices=[('waiting', 'Waiting'), ('confirming', 'Confirming'), ('confirmed', 'Confirmed'), ('sending', 'Sending'), ('partially_paid', 'Partially Paid'), ('finished', 'Finished'), ('failed', 'Failed'), ('refunded', 'Refunded'), ('expired', 'Expired')], db_index=True, default='waiting', max_length=20)),
+                ('price_amount', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('price_currency', models.CharField(default='usd', max_length=10)),
+                ('pay_amount', models.DecimalField(blank=True, decimal_places=8, max_digits=20, null=True)),
+                ('pay_currency', models.CharField(blank=True, max_length=10)),
+                ('actually_paid', models.DecimalField(blank=True, decimal_places=8, max_digits=20, null=True)),
+                ('invoice_url', models.URLField(max_length=500)),
+                ('webhook_data', models.JSONField(blank=True, default=dict)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('order', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='payment', to='orders.archivedorder')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'abstract': False,
+            },
+        ),
+    ]
@@ -2,7 +2,7 @@ from decimal import Decimal
 from django.db import models
 
 
-class Payment(models.Model):
+class AbstractPayment(models.Model):
     STATUS_WAITING = 'waiting'
     STATUS_CONFIRMING = 'confirming'
     STATUS_CONFIRMED = 'confirmed'
@@ -25,12 +25,6 @@ class Payment(models.Model):
         (STATUS_EXPIRED, 'Expired'),
     ]
 
-    order = models.OneToOneField(
-        'orders.Order',
-        on_delete=models.CASCADE,
-        related_name='payment'
-    )
-
     nowpayments_invoice_id = models.CharField(max_length=100, unique=True, db_index=True)
     nowpayments_payment_id = models.CharField(max_length=100, blank=True, db_index=True)
 
@@ -52,13 +46,8 @@ class Payment(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
+        abstract = True
         ordering = ['-created_at']
-        indexes = [
-            models.Index(fields=['nowpayments_invoice_id']),
-            models.Index(fields=['nowpayments_payment_id']),
-            models.Index(fields=['status']),
-            models.Index(fields=['-created_at']),
-        ]
 
     def __str__(self) -> str:
         return f"Payment for Order {self.order.order_id} - {self.get_status_display()}"
@@ -74,3 +63,27 @@ class Payment(models.Model):
     @property
     def is_failed(self) -> bool:
         return self.status in [self.STATUS_FAILED, self.STATUS_EXPIRED, self.STATUS_REFUNDED]
+
+
+class Payment(AbstractPayment):
+    order = models.OneToOneField(
+        'orders.Order',
+        on_delete=models.CASCADE,
+        related_name='payment'
+    )
+
+    class Meta(AbstractPayment.Meta):
+        indexes = [
+            models.Index(fields=['nowpayments_invoice_id']),
+            models.Index(fields=['nowpayments_payment_id']),
+            models.Index(fields=['status']),
+            models.Index(fields=['-created_at']),
+        ]
+
+
+class ArchivedPayment(AbstractPayment):
+    order = models.OneToOneField(
+        'orders.ArchivedOrder',
+        on_delete=models.CASCADE,
+        related_name='payment'
+    )
@@ -1,12 +1,13 @@
 import json
 import logging
-from django.shortcuts import render, redirect, get_object_or_404
+from django.shortcuts import render, redirect
 from django.http import JsonResponse, HttpRequest, HttpResponse
 from django.views.decorators.http import require_http_methods, require_POST
 from django.views.decorators.csrf import csrf_exempt
 from django.urls import reverse
 
 from apps.orders.models import Order
+from services.lookup_cache import NegativeLookupCache
 from services.payment_service import PaymentService
 
 logger = logging.getLogger(__name__)
@@ -14,7 +15,11 @@ logger = logging.getLogger(__name__)
 
 @require_http_methods(['GET', 'POST'])
 def create_invoice_view(request: HttpRequest, order_id: str) -> HttpResponse:
-    order = get_object_or_404(Order.objects.select_related('payment'), order_id=order_id)
+    order = NegativeLookupCache.get_object_or_404(
+        Order.objects.select_related('payment'),
+        NegativeLookupCache.ORDERS,
+        order_id=order_id
+    )
 
     if hasattr(order, 'payment'):
         return redirect('orders:awaiting_payment', order_id=order.order_id)
@@ -88,7 +93,11 @@ def webhook_view(request: HttpRequest) -> HttpResponse:
 
 @require_http_methods(['GET'])
 def success_view(request: HttpRequest, order_id: str) -> HttpResponse:
-    order = get_object_or_404(Order.objects.select_related('payment').prefetch_related('items'), order_id=order_id)
+    order = NegativeLookupCache.get_object_or_404(
+        Order.objects.select_related('payment').prefetch_related('items'),
+        NegativeLookupCache.ORDERS,
+        order_id=order_id
+    )
 
     context = {
         'order': order,
@@ -100,7 +109,11 @@ def success_view(request: HttpRequest, order_id: str) -> HttpResponse:
 
 @require_http_methods(['GET'])
 def failed_view(request: HttpRequest, order_id: str) -> HttpResponse:
-    order = get_object_or_404(Order.objects.select_related('payment'), order_id=order_id)
+    order = NegativeLookupCache.get_object_or_404(
+        Order.objects.select_related('payment'),
+        NegativeLookupCache.ORDERS,
+        order_id=order_id
+    )
 
     context = {
         'order': order,
@@ -112,7 +125,11 @@ def failed_view(request: HttpRequest, order_id: str) -> HttpResponse:
 
 @require_http_methods(['GET'])
 def check_payment_status_view(request: HttpRequest, order_id: str) -> HttpResponse:
-    order = get_object_or_404(Order.objects.select_related('payment'), order_id=order_id)
+    order = NegativeLookupCache.get_object_or_404(
+        Order.objects.select_related('payment'),
+        NegativeLookupCache.ORDERS,
+        order_id=order_id
+    )
 
     payment = getattr(order, 'payment', None)
     if not payment:
@@ -67,6 +67,7 @@ TEMPLATES = [
                 'django.template.context_processors.media',
                 'django.template.context_processors.static',
                 'apps.cart.context_processors.cart_context',
+                'apps.catalog.context_processors.navigation_context',
             ],
         },
     },
@@ -97,6 +98,34 @@ DATABASES = {
 # }
 
 
+# Cache
+# https://docs.djangoproject.com/en/6.0/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default=''),
+    }
+}
+
+
+# Cart storage
+# DatabaseCartStorage keeps carts in the cart tables; RedisCartStorage keeps
+# them as hashes at CART_STORAGE_LOCATION and only writes orders to SQL.
+
+CART_STORAGE_BACKEND = config('CART_STORAGE_BACKEND', default='apps.cart.storage.DatabaseCartStorage')
+CART_STORAGE_LOCATION = config('CART_STORAGE_LOCATION', default='')
+CART_STORAGE_TIMEOUT = 60 * 60 * 24 * 14
+
+
+# Order ids
+# A distinct ORDER_ID_NODE (0-63) per server keeps order ids from different
+# servers apart and is combined with each worker's pid; without it the node is
+# derived from the host name and pid.
+
+ORDER_ID_NODE = config('ORDER_ID_NODE', default='')
+
+
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
 
@@ -0,0 +1,68 @@
+from datetime import datetime
+
+from django.db import connection, transaction
+from django.db.models import Model
+from django.utils import timezone
+
+from apps.orders.models import ArchivedOrder, ArchivedOrderItem, Order, OrderItem
+from apps.payments.models import ArchivedPayment, Payment
+
+
+ARCHIVABLE_STATUSES = (Order.STATUS_DELIVERED, Order.STATUS_CANCELLED)
+
+# Live model, archive model and the column that ties the rows to an order.
+ARCHIVE_TABLES = (
+    (Order, ArchivedOrder, 'id'),
+    (OrderItem, ArchivedOrderItem, 'order_id'),
+    (Payment, ArchivedPayment, 'order_id'),
+)
+
+
+class OrderArchiveService:
+    @staticmethod
+    def _copy_rows(
+        source: type[Model],
+        target: type[Model],
+        column: str,
+        order_ids: list[int],
+        **extra
+    ) -> int:
+        # Rows are copied inside the database with their primary keys, so JSON
+        # payloads never round-trip through Python and archived orders keep
+        # their ids for admin links.
+        quote = connection.ops.quote_name
+        columns = [field.column for field in source._meta.concrete_fields]
+        insert_columns = ', '.join(quote(name) for name in [*columns, *extra])
+        select_columns = ', '.join([*(quote(name) for name in columns), *['%s'] * len(extra)])
+        placeholders = ', '.join(['%s'] * len(order_ids))
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {quote(target._meta.db_table)} ({insert_columns}) '
+                f'SELECT {select_columns} FROM {quote(source._meta.db_table)} '
+                f'WHERE {quote(column)} IN ({placeholders})',
+                [*extra.values(), *order_ids],
+            )
+            return cursor.rowcount
+
+    @staticmethod
+    @transaction.atomic
+    def archive_batch(cutoff: datetime, batch_size: int = 500) -> int:
+        order_ids = list(
+            Order.objects
+            .filter(status__in=ARCHIVABLE_STATUSES, created_at__lt=cutoff)
+            .order_by('created_at', 'id')
+            .select_for_update(skip_locked=True)
+            .values_list('id', flat=True)[:batch_size]
+        )
+        if not order_ids:
+            return 0
+
+        now = timezone.now()
+        for source, target, column in ARCHIVE_TABLES:
+            extra = {'archived_at': now} if target is ArchivedOrder else {}
+            OrderArchiveService._copy_rows(source, target, column, order_ids, **extra)
+
+        # Items, payments, idempotency keys and stock reservations cascade.
+        Order.objects.filter(id__in=order_ids).delete()
+        return len(order_ids)
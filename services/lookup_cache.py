@@ -0,0 +1,64 @@
+import hashlib
+from typing import Optional
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Model, QuerySet
+from django.http import Http404
+
+
+NEGATIVE_LOOKUP_TIMEOUT = 60 * 5
+
+
+class NegativeLookupCache:
+    PRODUCTS = 'product'
+    ORDERS = 'order'
+
+    # Namespaces whose rows may have moved to an archive table. A miss there
+    # is only remembered by lookups that also searched the archive, since the
+    # cached miss is shared with views that fall back to it.
+    ARCHIVED = {ORDERS}
+
+    @staticmethod
+    def _key(namespace: str, value: str) -> str:
+        digest = hashlib.sha1(str(value).encode()).hexdigest()
+        return f'missing:{namespace}:{digest}'
+
+    @staticmethod
+    def is_missing(namespace: str, value: str) -> bool:
+        return cache.get(NegativeLookupCache._key(namespace, value)) is not None
+
+    @staticmethod
+    def mark_missing(namespace: str, value: str) -> None:
+        cache.set(NegativeLookupCache._key(namespace, value), True, NEGATIVE_LOOKUP_TIMEOUT)
+
+    @staticmethod
+    def forget(namespace: str, value: str) -> None:
+        key = NegativeLookupCache._key(namespace, value)
+        cache.delete(key)
+        # Drop it again after commit so a miss recorded by a concurrent request
+        # that could not yet see the new row does not outlive the transaction.
+        transaction.on_commit(lambda: cache.delete(key))
+
+    @staticmethod
+    def get_object_or_404(
+        queryset: QuerySet,
+        namespace: str,
+        fallback: Optional[QuerySet] = None,
+        **lookup
+    ) -> Model:
+        value = next(iter(lookup.values()))
+        if NegativeLookupCache.is_missing(namespace, value):
+            raise Http404(f'No {queryset.model._meta.object_name} matches the given query.')
+
+        # The fallback (e.g. an archive table) is only consulted on a miss, and
+        # a miss is only remembered once neither of them has the row.
+        for candidate in filter(None, (queryset, fallback)):
+            try:
+                return candidate.get(**lookup)
+            except candidate.model.DoesNotExist:
+                pass
+
+        if fallback is not None or namespace not in NegativeLookupCache.ARCHIVED:
+            NegativeLookupCache.mark_missing(namespace, value)
+        raise Http404(f'No {queryset.model._meta.object_name} matches the given query.')
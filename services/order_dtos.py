@@ -1,4 +1,5 @@
 from dataclasses import dataclass
+from datetime import date, datetime
 from decimal import Decimal
 from typing import Optional
 
@@ -10,6 +11,11 @@ class CustomerInfoDTO:
     last_name: str
     phone: str
 
+    def __post_init__(self):
+        # Orders are looked up by exact email, so it is stored lowercased.
+        if self.email:
+            self.email = self.email.lower()
+
 
 @dataclass
 class ShippingAddressDTO:
@@ -49,3 +55,44 @@ class OrderCreatedDTO:
     order_id: str
     total: Decimal
     customer_email: str
+
+
+@dataclass
+class OrderSummaryDTO:
+    order_id: str
+    status: str
+    total: Decimal
+    created_at: datetime
+
+
+@dataclass
+class OrderHistoryPageDTO:
+    orders: list[OrderSummaryDTO]
+    next_cursor: Optional[str] = None
+
+
+@dataclass
+class OrderTransitionDTO:
+    UPDATED = 'updated'
+    UNCHANGED = 'unchanged'
+    NOT_ALLOWED = 'not_allowed'
+    NOT_FOUND = 'not_found'
+
+    order_id: str
+    outcome: str
+    old_status: Optional[str] = None
+    new_status: Optional[str] = None
+
+
+@dataclass
+class SalesDashboardDTO:
+    start: date
+    end: date
+    orders: int
+    units: int
+    revenue: Decimal
+    days: list[dict]
+    statuses: list[dict]
+    shipping_methods: list[dict]
+    brands: list[dict]
+    products: list[dict]
@@ -1,27 +1,60 @@
-import uuid
+import base64
+import binascii
+from datetime import datetime
 from decimal import Decimal
-from django.db import transaction
+from typing import Optional
+from django.db import IntegrityError, transaction
+from django.db.models import Q
 from django.utils import timezone
 
-from apps.orders.models import Order, OrderItem
-from apps.cart.models import Cart
-from .order_dtos import CreateOrderDTO, OrderCreatedDTO, OrderItemDTO
+from apps.orders.models import AbstractOrder, ArchivedOrder, Order, OrderItem
+from apps.orders.signals import order_status_changed
+from apps.cart.dto import CartLine
+from .order_dtos import (
+    CreateOrderDTO, OrderCreatedDTO, OrderHistoryPageDTO, OrderItemDTO, OrderSummaryDTO,
+    OrderTransitionDTO
+)
+from .order_id import ulid_generator
+from .stock_service import StockService
+
+
+ORDER_ID_ATTEMPTS = 3
+
+ORDER_HISTORY_PAGE_SIZE = 20
+ORDER_HISTORY_MAX_PAGE_SIZE = 100
+
+
+class InvalidTransitionError(ValueError):
+    def __init__(self, order_id: str, old_status: str, new_status: str):
+        self.order_id = order_id
+        self.old_status = old_status
+        self.new_status = new_status
+        super().__init__(f'Order {order_id} cannot move from {old_status} to {new_status}')
 
 
 class OrderService:
     @staticmethod
     def generate_order_id() -> str:
-        timestamp = timezone.now().strftime('%Y%m%d')
-        unique_part = str(uuid.uuid4().hex[:8]).upper()
-        return f"ORD-{timestamp}-{unique_part}"
+        return f"ORD-{ulid_generator.new()}"
+
+    @staticmethod
+    def _create_with_unique_order_id(**fields) -> Order:
+        # Ids are unique per worker by construction; across workers the node
+        # bits and 64 random bits make a clash improbable and the retry makes
+        # it harmless. Any other integrity error is not retried.
+        for attempt in range(ORDER_ID_ATTEMPTS):
+            order_id = OrderService.generate_order_id()
+            try:
+                with transaction.atomic():
+                    return Order.objects.create(order_id=order_id, **fields)
+            except IntegrityError:
+                if attempt == ORDER_ID_ATTEMPTS - 1 or not Order.objects.filter(order_id=order_id).exists():
+                    raise
 
     @staticmethod
     @transaction.atomic
     def create_order_from_dto(dto: CreateOrderDTO) -> OrderCreatedDTO:
-        order_id = OrderService.generate_order_id()
-
-        order = Order.objects.create(
-            order_id=order_id,
+        order = OrderService._create_with_unique_order_id(
             status=Order.STATUS_PENDING,
             customer_email=dto.customer_info.email,
             customer_first_name=dto.customer_info.first_name,
@@ -40,8 +73,8 @@ class OrderService:
             notes=dto.notes or '',
         )
 
-        for item_dto in dto.items:
-            OrderItem.objects.create(
+        OrderItem.objects.bulk_create([
+            OrderItem(
                 order=order,
                 product_name=item_dto.product_name,
                 product_slug=item_dto.product_slug,
@@ -51,6 +84,10 @@ class OrderService:
                 line_total=item_dto.product_price * item_dto.quantity,
                 product_snapshot=item_dto.product_snapshot,
             )
+            for item_dto in dto.items
+        ])
+
+        StockService.reserve(order, dto.items)
 
         return OrderCreatedDTO(
             order_id=order.order_id,
@@ -60,8 +97,8 @@ class OrderService:
 
     @staticmethod
     @transaction.atomic
-    def create_order_from_cart(
-        cart: Cart,
+    def create_order_from_lines(
+        lines: list[CartLine],
         customer_info: dict,
         shipping_address: dict,
         shipping_method: str,
@@ -70,9 +107,14 @@ class OrderService:
     ) -> OrderCreatedDTO:
         from apps.catalog.models import Product
 
+        products = Product.objects.in_bulk([line.product_id for line in lines])
+
         items = []
-        for cart_item in cart.items.select_related('product').all():
-            product = cart_item.product
+        for line in lines:
+            product = products.get(line.product_id)
+            if product is None:
+                continue
+
             product_snapshot = {
                 'name': product.name,
                 'price': str(product.price),
@@ -87,12 +129,15 @@ class OrderService:
                 product_name=product.name,
                 product_slug=product.slug,
                 product_price=product.price,
-                size=cart_item.size,
-                quantity=cart_item.quantity,
+                size=line.size,
+                quantity=line.quantity,
                 product_snapshot=product_snapshot,
             ))
 
-        subtotal = cart.subtotal
+        if not items:
+            raise ValueError('Cart is empty')
+
+        subtotal = sum((item.product_price * item.quantity for item in items), Decimal('0.00'))
         total = subtotal + shipping_cost
 
         from .order_dtos import CustomerInfoDTO, ShippingAddressDTO
@@ -108,24 +153,142 @@ class OrderService:
             notes=notes,
         )
 
-        order_created = OrderService.create_order_from_dto(dto)
+        return OrderService.create_order_from_dto(dto)
+
+    @staticmethod
+    def get_order_by_id(order_id: str) -> AbstractOrder:
+        try:
+            return Order.objects.select_related('payment').prefetch_related('items').get(order_id=order_id)
+        except Order.DoesNotExist:
+            return ArchivedOrder.objects.select_related('payment').prefetch_related('items').get(
+                order_id=order_id
+            )
 
-        cart.items.all().delete()
+    @staticmethod
+    def _encode_history_cursor(created_at: datetime, pk: int) -> str:
+        value = f'{created_at.isoformat()}|{pk}'.encode()
+        return base64.urlsafe_b64encode(value).decode().rstrip('=')
 
-        return order_created
+    @staticmethod
+    def _decode_history_cursor(cursor: str) -> tuple[datetime, int]:
+        try:
+            value = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+            created_at, pk = value.split('|')
+            return datetime.fromisoformat(created_at), int(pk)
+        except (binascii.Error, UnicodeDecodeError, ValueError):
+            raise ValueError('Invalid cursor')
 
     @staticmethod
-    def get_order_by_id(order_id: str) -> Order:
-        return Order.objects.select_related('payment').prefetch_related('items').get(order_id=order_id)
+    def get_order_history(
+        customer_email: str,
+        cursor: Optional[str] = None,
+        limit: int = ORDER_HISTORY_PAGE_SIZE,
+    ) -> OrderHistoryPageDTO:
+        # Emails are stored lowercased, so the lookup stays an exact match.
+        customer_email = customer_email.lower()
+        limit = max(1, min(limit, ORDER_HISTORY_MAX_PAGE_SIZE))
+        keyset = Q()
+        if cursor:
+            created_at, pk = OrderService._decode_history_cursor(cursor)
+            keyset = Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk)
+
+        # Seeking past the last row seen keeps every page a short range scan of
+        # each table's history index, however deep the customer pages. Archived
+        # orders keep their ids, so both tables share one keyset and the two
+        # runs are merged into a single ordered page.
+        rows = []
+        for model in (Order, ArchivedOrder):
+            rows += (
+                model.objects
+                .filter(keyset, customer_email=customer_email)
+                .order_by('-created_at', '-id')
+                .values_list('id', 'order_id', 'status', 'total', 'created_at')[:limit + 1]
+            )
+        rows.sort(key=lambda row: (row[4], row[0]), reverse=True)
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last_pk, *_, last_created_at = rows[-1]
+            next_cursor = OrderService._encode_history_cursor(last_created_at, last_pk)
+
+        return OrderHistoryPageDTO(
+            orders=[
+                OrderSummaryDTO(order_id=order_id, status=status, total=total, created_at=created_at)
+                for _, order_id, status, total, created_at in rows
+            ],
+            next_cursor=next_cursor,
+        )
 
     @staticmethod
     @transaction.atomic
     def update_order_status(order_id: str, status: str) -> Order:
-        order = Order.objects.get(order_id=order_id)
+        # The row lock makes repeated webhooks for the same order see each
+        # other's status, so a transition is only reported once.
+        order = Order.objects.select_for_update().get(order_id=order_id)
+        old_status = order.status
+        if old_status == status:
+            return order
+        if not Order.can_transition(old_status, status):
+            raise InvalidTransitionError(order_id, old_status, status)
+
         order.status = status
         order.save(update_fields=['status', 'updated_at'])
+        order_status_changed.send(
+            sender=Order, orders=[order], old_statuses={order.pk: old_status}, new_status=status
+        )
         return order
 
+    @staticmethod
+    @transaction.atomic
+    def bulk_transition(order_ids: list[str], status: str) -> list[OrderTransitionDTO]:
+        if status not in dict(Order.STATUS_CHOICES):
+            raise ValueError(f'Unknown order status: {status}')
+
+        allowed_from = Order.allowed_from(status)
+        orders = {
+            order.order_id: order
+            for order in (
+                Order.objects
+                .filter(order_id__in=set(order_ids))
+                .select_for_update()
+                .only('id', 'order_id', 'status', 'shipping_method', 'total', 'created_at')
+            )
+        }
+
+        outcomes = []
+        moving = []
+        for order_id in dict.fromkeys(order_ids):
+            order = orders.get(order_id)
+            if order is None:
+                outcomes.append(OrderTransitionDTO(order_id, OrderTransitionDTO.NOT_FOUND))
+            elif order.status == status:
+                outcomes.append(OrderTransitionDTO(order_id, OrderTransitionDTO.UNCHANGED, status, status))
+            elif order.status not in allowed_from:
+                outcomes.append(
+                    OrderTransitionDTO(order_id, OrderTransitionDTO.NOT_ALLOWED, order.status, order.status)
+                )
+            else:
+                outcomes.append(OrderTransitionDTO(order_id, OrderTransitionDTO.UPDATED, order.status, status))
+                moving.append(order)
+
+        if not moving:
+            return outcomes
+
+        # One statement moves every eligible order, with the transition rule
+        # repeated in its WHERE clause.
+        Order.objects.filter(
+            id__in=[order.pk for order in moving],
+            status__in=allowed_from,
+        ).update(status=status, updated_at=timezone.now())
+
+        old_statuses = {order.pk: order.status for order in moving}
+        for order in moving:
+            order.status = status
+        order_status_changed.send(sender=Order, orders=moving, old_statuses=old_statuses, new_status=status)
+
+        return outcomes
+
     @staticmethod
     @transaction.atomic
     def mark_order_as_paid(order_id: str) -> Order:
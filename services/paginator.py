@@ -0,0 +1,46 @@
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+
+# Below this many rows an exact COUNT(*) is cheap enough to keep.
+ESTIMATED_COUNT_THRESHOLD = 100_000
+
+
+# Unfiltered changelists of large tables are paginated with the planner's row
+# estimate; filtered querysets, small tables and databases without table
+# statistics keep an exact count. The last page may therefore come up short.
+class EstimatedCountPaginator(Paginator):
+
+    def _estimate(self):
+        queryset = self.object_list
+        if not hasattr(queryset, 'query') or queryset.query.where or queryset.query.distinct:
+            return None
+
+        connection = connections[queryset.db]
+        table = queryset.model._meta.db_table
+
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass', [table])
+            elif connection.vendor == 'mysql':
+                cursor.execute(
+                    'SELECT table_rows FROM information_schema.tables '
+                    'WHERE table_schema = DATABASE() AND table_name = %s',
+                    [table],
+                )
+            else:
+                return None
+            row = cursor.fetchone()
+
+        # PostgreSQL reports -1 for tables that have never been analyzed.
+        if not row or row[0] is None or row[0] < 0:
+            return None
+        return int(row[0])
+
+    @cached_property
+    def count(self) -> int:
+        estimate = self._estimate()
+        if estimate is not None and estimate >= ESTIMATED_COUNT_THRESHOLD:
+            return estimate
+        return super().count
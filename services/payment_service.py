@@ -1,6 +1,7 @@
 import hmac
 import hashlib
 import json
+import logging
 import requests
 from decimal import Decimal
 from typing import Optional
@@ -10,6 +11,9 @@ from django.db import transaction
 from apps.payments.models import Payment
 from apps.orders.models import Order
 from .payment_dtos import CreateInvoiceDTO, InvoiceCreatedDTO, WebhookPayloadDTO
+from .stock_service import StockService
+
+logger = logging.getLogger(__name__)
 
 
 class NOWPaymentsClient:
@@ -77,6 +81,10 @@ class PaymentService:
     @staticmethod
     @transaction.atomic
     def create_invoice_for_order(order: Order, ipn_callback_url: str, success_url: str, cancel_url: str) -> InvoiceCreatedDTO:
+        from .order_service import InvalidTransitionError, OrderService
+        if not Order.can_transition(order.status, Order.STATUS_AWAITING_PAYMENT):
+            raise InvalidTransitionError(order.order_id, order.status, Order.STATUS_AWAITING_PAYMENT)
+
         client = PaymentService.get_nowpayments_client()
 
         dto = CreateInvoiceDTO(
@@ -101,8 +109,7 @@ class PaymentService:
             invoice_url=response['invoice_url'],
         )
 
-        order.status = Order.STATUS_AWAITING_PAYMENT
-        order.save(update_fields=['status', 'updated_at'])
+        order.status = OrderService.update_order_status(order.order_id, Order.STATUS_AWAITING_PAYMENT).status
 
         return InvoiceCreatedDTO(
             invoice_id=payment.nowpayments_invoice_id,
@@ -163,8 +170,16 @@ class PaymentService:
         payment.save()
 
         if payment.is_successful:
-            from .order_service import OrderService
-            OrderService.mark_order_as_paid(payment.order.order_id)
+            from .order_service import InvalidTransitionError, OrderService
+            try:
+                OrderService.mark_order_as_paid(payment.order.order_id)
+            except InvalidTransitionError as e:
+                # Acknowledge the webhook; retries could never move the order.
+                logger.warning(f"Payment received for order that cannot be paid: {e}")
+            else:
+                StockService.consume(payment.order)
+        elif payment.is_failed:
+            StockService.release(payment.order)
 
         return payment
 
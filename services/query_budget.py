@@ -0,0 +1,39 @@
+import logging
+from contextlib import ContextDecorator
+
+from django.db import connection
+
+
+logger = logging.getLogger(__name__)
+
+
+class query_budget(ContextDecorator):
+    # Counts the queries run inside the block or view and logs a warning when
+    # they go over the budget. It never raises: by the time the block exits
+    # its transaction may already be committed. Tests assert the budget.
+
+    def __init__(self, limit: int, label: str = ''):
+        self.limit = limit
+        self.label = label
+        self.count = 0
+
+    def _recreate_cm(self):
+        # Each decorated call gets its own counter; the decorator instance is
+        # shared between threads.
+        return query_budget(self.limit, self.label)
+
+    def _count(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+    def __enter__(self):
+        self.count = 0
+        self._wrapper = connection.execute_wrapper(self._count)
+        self._wrapper.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._wrapper.__exit__(exc_type, exc, tb)
+        if exc_type is None and self.count > self.limit:
+            logger.warning(f"{self.label or 'Block'} ran {self.count} queries, budget is {self.limit}")
+        return False
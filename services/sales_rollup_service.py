@@ -0,0 +1,257 @@
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Max, Sum
+from django.db.models.fields.json import KT
+from django.utils import timezone
+
+from apps.orders.models import (
+    ArchivedOrder, ArchivedOrderItem, DailyProductSalesRollup, DailySalesRollup, Order, OrderItem
+)
+from .order_dtos import SalesDashboardDTO
+
+
+# Orders enter the rollups once they are paid and keep moving between these
+# buckets afterwards; only the first three count as revenue.
+ROLLUP_STATUSES = (
+    Order.STATUS_PAID,
+    Order.STATUS_SHIPPED,
+    Order.STATUS_DELIVERED,
+    Order.STATUS_CANCELLED,
+    Order.STATUS_REFUNDED,
+)
+REVENUE_STATUSES = (Order.STATUS_PAID, Order.STATUS_SHIPPED, Order.STATUS_DELIVERED)
+
+# Rebuilds read archived orders too, so archiving never changes past rollups.
+ROLLUP_SOURCES = ((Order, OrderItem), (ArchivedOrder, ArchivedOrderItem))
+
+SALES_DASHBOARD_CACHE_TIMEOUT = 60 * 5
+SALES_DASHBOARD_TOP_N = 10
+
+
+class SalesRollupService:
+    @staticmethod
+    def _increment(model, lookup: dict, deltas: dict, defaults: dict = None) -> None:
+        changes = {field: F(field) + delta for field, delta in deltas.items()}
+        if model.objects.filter(**lookup).update(**changes):
+            return
+
+        try:
+            with transaction.atomic():
+                model.objects.create(**lookup, **deltas, **(defaults or {}))
+        except IntegrityError:
+            # Another transaction created the bucket first.
+            model.objects.filter(**lookup).update(**changes)
+
+    @staticmethod
+    def _product_lines(order_ids: list[int]) -> dict:
+        lines = {}
+        items = OrderItem.objects.filter(order_id__in=order_ids).values_list(
+            'order_id', 'product_slug', 'product_name', KT('product_snapshot__brand'), 'quantity', 'line_total'
+        )
+        for order_id, slug, name, brand, quantity, line_total in items:
+            line = lines.setdefault(order_id, {}).setdefault(slug, {
+                'product_name': name,
+                'brand': brand or '',
+                'units': 0,
+                'revenue': Decimal('0.00'),
+            })
+            line['units'] += quantity
+            line['revenue'] += line_total
+        return lines
+
+    @staticmethod
+    @transaction.atomic
+    def apply_status_changes(orders: list[Order], old_statuses: dict, new_status: str) -> None:
+        orders = [
+            order for order in orders
+            if old_statuses[order.pk] != new_status
+            and (old_statuses[order.pk] in ROLLUP_STATUSES or new_status in ROLLUP_STATUSES)
+        ]
+        if not orders:
+            return
+
+        # Deltas are summed per bucket first, so a bulk transition writes each
+        # rollup row once however many orders it covers.
+        lines = SalesRollupService._product_lines([order.pk for order in orders])
+        buckets = {}
+        products = {}
+
+        for order in orders:
+            old_status = old_statuses[order.pk]
+            day = timezone.localdate(order.created_at)
+            order_lines = lines.get(order.pk, {})
+            units = sum(line['units'] for line in order_lines.values())
+
+            for status, sign in ((old_status, -1), (new_status, 1)):
+                if status in ROLLUP_STATUSES:
+                    bucket = buckets.setdefault(
+                        (day, status, order.shipping_method),
+                        {'orders': 0, 'units': 0, 'revenue': Decimal('0.00')},
+                    )
+                    bucket['orders'] += sign
+                    bucket['units'] += sign * units
+                    bucket['revenue'] += sign * order.total
+
+            if (old_status in REVENUE_STATUSES) == (new_status in REVENUE_STATUSES):
+                continue
+
+            sign = 1 if new_status in REVENUE_STATUSES else -1
+            for slug, line in order_lines.items():
+                product = products.setdefault((day, slug), {
+                    'defaults': {'product_name': line['product_name'], 'brand': line['brand']},
+                    'deltas': {'orders': 0, 'units': 0, 'revenue': Decimal('0.00')},
+                })
+                product['deltas']['orders'] += sign
+                product['deltas']['units'] += sign * line['units']
+                product['deltas']['revenue'] += sign * line['revenue']
+
+        # Rows are always written in key order so concurrent transitions
+        # cannot deadlock on each other's buckets.
+        for key in sorted(buckets):
+            day, status, shipping_method = key
+            if any(buckets[key].values()):
+                SalesRollupService._increment(
+                    DailySalesRollup,
+                    {'date': day, 'status': status, 'shipping_method': shipping_method},
+                    buckets[key],
+                )
+
+        for key in sorted(products):
+            day, slug = key
+            SalesRollupService._increment(
+                DailyProductSalesRollup,
+                {'date': day, 'product_slug': slug},
+                products[key]['deltas'],
+                defaults=products[key]['defaults'],
+            )
+
+    @staticmethod
+    @transaction.atomic
+    def rebuild_day(day: date) -> int:
+        # A bounded created_at range rather than a date cast, so the scan can
+        # use the created_at index and only ever touches one day of orders.
+        start = timezone.make_aware(datetime.combine(day, time.min))
+        buckets = {}
+        products = {}
+
+        for order_model, item_model in ROLLUP_SOURCES:
+            orders = order_model.objects.filter(
+                created_at__gte=start,
+                created_at__lt=start + timedelta(days=1),
+                status__in=ROLLUP_STATUSES,
+            )
+            items = item_model.objects.filter(order__in=orders)
+
+            for row in (
+                orders
+                .values('status', 'shipping_method')
+                .annotate(orders=Count('id'), revenue=Sum('total'))
+                .order_by()
+            ):
+                bucket = buckets.setdefault(
+                    (row['status'], row['shipping_method']),
+                    {'orders': 0, 'units': 0, 'revenue': Decimal('0.00')},
+                )
+                bucket['orders'] += row['orders']
+                bucket['revenue'] += row['revenue']
+
+            for row in (
+                items
+                .values('order__status', 'order__shipping_method')
+                .annotate(units=Sum('quantity'))
+                .order_by()
+            ):
+                buckets[(row['order__status'], row['order__shipping_method'])]['units'] += row['units']
+
+            for row in (
+                items
+                .filter(order__status__in=REVENUE_STATUSES)
+                .values('product_slug')
+                .annotate(
+                    product_name=Max('product_name'),
+                    brand=Max(KT('product_snapshot__brand'), default=''),
+                    orders=Count('order', distinct=True),
+                    units=Sum('quantity'),
+                    revenue=Sum('line_total'),
+                )
+                .order_by()
+            ):
+                product = products.setdefault(row['product_slug'], {
+                    'product_name': row['product_name'],
+                    'brand': row['brand'] or '',
+                    'orders': 0,
+                    'units': 0,
+                    'revenue': Decimal('0.00'),
+                })
+                product['orders'] += row['orders']
+                product['units'] += row['units']
+                product['revenue'] += row['revenue']
+
+        DailySalesRollup.objects.filter(date=day).delete()
+        DailyProductSalesRollup.objects.filter(date=day).delete()
+
+        DailySalesRollup.objects.bulk_create([
+            DailySalesRollup(date=day, status=status, shipping_method=shipping_method, **totals)
+            for (status, shipping_method), totals in buckets.items()
+        ])
+        DailyProductSalesRollup.objects.bulk_create([
+            DailyProductSalesRollup(date=day, product_slug=slug, **totals)
+            for slug, totals in products.items()
+        ])
+
+        return sum(bucket['orders'] for bucket in buckets.values())
+
+    @staticmethod
+    def get_dashboard(start: date, end: date) -> SalesDashboardDTO:
+        cache_key = f'sales:dashboard:{start.isoformat()}:{end.isoformat()}'
+        dashboard = cache.get(cache_key)
+        if dashboard is None:
+            dashboard = SalesRollupService._build_dashboard(start, end)
+            cache.set(cache_key, dashboard, SALES_DASHBOARD_CACHE_TIMEOUT)
+        return dashboard
+
+    @staticmethod
+    def _build_dashboard(start: date, end: date) -> SalesDashboardDTO:
+        # Only rollup rows are read, so the cost depends on the date range and
+        # the number of buckets per day, never on how many orders exist.
+        buckets = DailySalesRollup.objects.filter(date__gte=start, date__lte=end)
+        revenue_buckets = buckets.filter(status__in=REVENUE_STATUSES)
+        products = DailyProductSalesRollup.objects.filter(date__gte=start, date__lte=end)
+        totals = {
+            'orders': Sum('orders', default=0),
+            'units': Sum('units', default=0),
+            'revenue': Sum('revenue', default=Decimal('0.00')),
+        }
+
+        summary = revenue_buckets.aggregate(**totals)
+        status_labels = dict(Order.STATUS_CHOICES)
+        shipping_labels = dict(Order.SHIPPING_CHOICES)
+
+        return SalesDashboardDTO(
+            start=start,
+            end=end,
+            orders=summary['orders'],
+            units=summary['units'],
+            revenue=summary['revenue'],
+            days=list(revenue_buckets.values('date').annotate(**totals).order_by('-date')),
+            statuses=[
+                {**row, 'label': status_labels.get(row['status'], row['status'])}
+                for row in buckets.values('status').annotate(**totals).order_by('-revenue')
+            ],
+            shipping_methods=[
+                {**row, 'label': shipping_labels.get(row['shipping_method'], row['shipping_method'])}
+                for row in revenue_buckets.values('shipping_method').annotate(**totals).order_by('-revenue')
+            ],
+            brands=list(
+                products.values('brand').annotate(**totals).order_by('-revenue')[:SALES_DASHBOARD_TOP_N]
+            ),
+            products=list(
+                products
+                .values('product_slug')
+                .annotate(product_name=Max('product_name'), brand=Max('brand'), **totals)
+                .order_by('-revenue')[:SALES_DASHBOARD_TOP_N]
+            ),
+        )
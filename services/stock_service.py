@@ -0,0 +1,167 @@
+import logging
+from datetime import timedelta
+from functools import reduce
+from operator import or_
+
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Q, Value, When
+from django.utils import timezone
+
+from apps.catalog.models import ProductStock
+from apps.orders.models import Order, StockReservation
+
+
+STOCK_RESERVATION_TIMEOUT = timedelta(minutes=60)
+
+logger = logging.getLogger(__name__)
+
+
+class OutOfStockError(Exception):
+    def __init__(self, lines: list[tuple[int, str]]):
+        self.lines = lines
+        super().__init__('Some items are no longer in stock')
+
+
+class StockService:
+    @staticmethod
+    def _match(keys) -> Q:
+        return reduce(or_, (Q(product_id=product_id, size=size) for product_id, size in keys))
+
+    @staticmethod
+    def _per_line(quantities: dict) -> Case:
+        return Case(
+            *[
+                When(product_id=product_id, size=size, then=Value(quantity))
+                for (product_id, size), quantity in quantities.items()
+            ],
+            default=Value(0),
+            output_field=IntegerField(),
+        )
+
+    @staticmethod
+    def _adjust(quantities: dict, sign: int) -> int:
+        if not quantities:
+            return 0
+
+        delta = StockService._per_line(quantities)
+        stock = ProductStock.objects.filter(StockService._match(quantities))
+
+        if sign < 0:
+            # The guard and the decrement are evaluated per row by the database
+            # itself, so concurrent checkouts can never drive a size below zero.
+            return stock.filter(quantity__gte=delta).update(
+                quantity=F('quantity') - delta,
+                updated_at=timezone.now(),
+            )
+        return stock.update(quantity=F('quantity') + delta, updated_at=timezone.now())
+
+    @staticmethod
+    def reserve(order: Order, lines) -> list[StockReservation]:
+        quantities = {}
+        for line in lines:
+            key = (line.product_id, line.size)
+            quantities[key] = quantities.get(key, 0) + line.quantity
+
+        if not quantities:
+            return []
+
+        # Products without stock rows are not tracked and are never limited.
+        tracked = set(
+            ProductStock.objects
+            .filter(StockService._match(quantities))
+            .values_list('product_id', 'size')
+        )
+        quantities = {key: quantity for key, quantity in quantities.items() if key in tracked}
+
+        if StockService._adjust(quantities, -1) != len(quantities):
+            short = list(
+                ProductStock.objects
+                .filter(StockService._match(quantities))
+                .filter(quantity__lt=StockService._per_line(quantities))
+                .values_list('product_id', 'size')
+            )
+            raise OutOfStockError(short or list(quantities))
+
+        expires_at = timezone.now() + STOCK_RESERVATION_TIMEOUT
+        return StockReservation.objects.bulk_create([
+            StockReservation(
+                order=order,
+                product_id=product_id,
+                size=size,
+                quantity=quantity,
+                expires_at=expires_at,
+            )
+            for (product_id, size), quantity in quantities.items()
+        ])
+
+    @staticmethod
+    @transaction.atomic
+    def consume(order: Order) -> int:
+        # Locking the rows makes release_expired skip them while the order is
+        # being paid; reservations it already released are taken again below.
+        rows = list(
+            StockReservation.objects
+            .select_for_update()
+            .filter(order=order, status__in=[StockReservation.STATUS_RESERVED, StockReservation.STATUS_RELEASED])
+            .values_list('id', 'status', 'product_id', 'size', 'quantity')
+        )
+
+        consumed = [row[0] for row in rows if row[1] == StockReservation.STATUS_RESERVED]
+        short = []
+        for reservation_id, status, product_id, size, quantity in rows:
+            if status != StockReservation.STATUS_RELEASED:
+                continue
+            if StockService._adjust({(product_id, size): quantity}, -1):
+                consumed.append(reservation_id)
+            else:
+                short.append((product_id, size))
+
+        if short:
+            # The released reservations stay visible in the admin so the
+            # order can be resolved by hand.
+            logger.error(f"Order {order.order_id} was paid after its stock was released and is short of {short}")
+
+        return StockReservation.objects.filter(id__in=consumed).update(status=StockReservation.STATUS_CONSUMED)
+
+    @staticmethod
+    def release(order: Order) -> int:
+        return StockService._release(
+            StockReservation.objects.filter(order=order, status=StockReservation.STATUS_RESERVED)
+        )
+
+    @staticmethod
+    def release_orders(orders: list[Order]) -> int:
+        return StockService._release(
+            StockReservation.objects.filter(order__in=orders, status=StockReservation.STATUS_RESERVED)
+        )
+
+    @staticmethod
+    def release_expired(batch_size: int = 500) -> int:
+        return StockService._release(
+            StockReservation.objects
+            .filter(status=StockReservation.STATUS_RESERVED, expires_at__lt=timezone.now())
+            .order_by('expires_at'),
+            batch_size,
+        )
+
+    @staticmethod
+    @transaction.atomic
+    def _release(reservations, batch_size: int = None) -> int:
+        reservations = reservations.select_for_update(skip_locked=True)
+        if batch_size:
+            reservations = reservations[:batch_size]
+
+        rows = list(reservations.values_list('id', 'product_id', 'size', 'quantity'))
+        if not rows:
+            return 0
+
+        quantities = {}
+        for _, product_id, size, quantity in rows:
+            key = (product_id, size)
+            quantities[key] = quantities.get(key, 0) + quantity
+
+        StockReservation.objects.filter(id__in=[row[0] for row in rows]).update(
+            status=StockReservation.STATUS_RELEASED
+        )
+        StockService._adjust(quantities, 1)
+        return len(rows)